@@ -3,19 +3,21 @@ import logging
 import os
 import random
 import asyncio
+from collections import OrderedDict
 from discord.ext import commands, tasks
 from datetime import datetime
 from utils.config import DISCORD_TOKEN, LOG_CHANNEL_ID, DATABASE_ENABLED, OWNER_ID
 from utils.database import DatabaseManager
+from utils.settings_store import SettingsStore
+from utils.premium_service import PremiumService
+from utils.role_queue import RoleMutationQueue
+from utils.image_worker import ImageWorkerPool
+from utils.asset_fetcher import AssetFetcher
+from utils.member_index import MemberIndex
 import sys, io
 import json
 import aiohttp
-# --- Set up stdout/stderr encoding (from your original code) ---
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-# --- Logging setup ---
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 def load_config():
@@ -30,13 +32,6 @@ def load_config():
         logger.critical("bot_config.json is not a valid JSON file!")
         raise SystemExit(1)
 
-try:
-    bot_config = load_config()
-    DEFAULT_PREFIX = bot_config['bot_settings']['default_prefix']
-except (KeyError, ValueError) as e:
-    logger.critical(f"Error reading values from bot_config.json: {e}")
-    raise SystemExit(1)
-
 
 # --- Your original global variables ---
 CREATIVE_ACTIVITIES = [
@@ -63,16 +58,26 @@ PREFERRED_EMOJIS = {
 }
 
 class CharacterBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, bot_config: dict):
         intents = discord.Intents.all()
         intents.message_content = True
         intents.members = True
         intents.presences = True
 
         # --- UPDATED: Use the prefix from the config file ---
-        super().__init__(command_prefix=DEFAULT_PREFIX, intents=intents, help_command=None)
+        # Snipe keeps its own compact content ring, so the library's Message cache is disabled
+        super().__init__(command_prefix=bot_config['bot_settings']['default_prefix'], intents=intents, help_command=None, max_messages=None)
         self.bot_config = bot_config
         self.db_manager = DatabaseManager(DATABASE_ENABLED)
+        self.settings_store = SettingsStore()
+        self.premium = PremiumService(self.settings_store)
+        self.role_queue = RoleMutationQueue(self)
+        # CPU-heavy image rendering runs here, off the event loop
+        self.image_pool = ImageWorkerPool()
+        # Avatar / CDN downloads on the shared session, cached and coalesced
+        self.assets = AssetFetcher(self)
+        # Name / random-member lookups without scanning guild.members per command
+        self.member_index = MemberIndex(self)
         self.premium_guild_ids = set()
         self.premium_guild_tiers = {}
         self.session = None
@@ -88,6 +93,25 @@ class CharacterBot(commands.Bot):
         }
         self.log_channel = None
         self.rate_limits = {}
+        # (message id, edited_at) -> Future[Context], so a message is parsed once per dispatch
+        self._context_cache = OrderedDict()
+
+    def get_message_context(self, message):
+        """Command context for a message, shared by process_commands and cog listeners"""
+        key = (message.id, message.edited_at)
+        future = self._context_cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self.get_context(message))
+            self._context_cache[key] = future
+            if len(self._context_cache) > 256:
+                self._context_cache.popitem(last=False)
+        return future
+
+    async def process_commands(self, message):
+        if message.author.bot:
+            return
+        ctx = await self.get_message_context(message)
+        await self.invoke(ctx)
 
     def load_premium_guilds(self):
         self.premium_guild_ids = set()
@@ -101,26 +125,12 @@ class CharacterBot(commands.Bot):
         """Check if guild has premium access using multiple sources"""
         guild_str = str(guild_id)
     
-        # Method 1: Check premium_data.json (primary source)
+        # Method 1: PremiumService (primary source, in-memory)
         try:
-            path = os.path.join("data", "premium_data.json")
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    premium_data = json.load(f)
-                if guild_str in premium_data.get("subscriptions", {}):
-                    subscription = premium_data["subscriptions"][guild_str]
-                    expires_at = subscription.get("expires_at")
-                    if expires_at and expires_at != "null" and expires_at is not None:
-                        try:
-                            exp_date = datetime.fromisoformat(expires_at)
-                            if datetime.now() > exp_date:
-                                return False  # Expired
-                        except ValueError:
-                            pass
-                    tier = subscription.get("tier", "FREE").lower()
-                    return tier != "free"
+            if self.premium.is_premium(guild_id):
+                return True
         except Exception as e:
-            logger.error(f"Error reading premium_data.json: {e}")
+            logger.error(f"Error checking premium for guild {guild_id}: {e}")
     
         # Method 2: Check cached premium guilds set (fallback)
         if hasattr(self, 'premium_guild_ids'):
@@ -161,6 +171,16 @@ class CharacterBot(commands.Bot):
         except Exception as e:
             logger.error(f"Error sending log: {e}")
 
+    async def close(self):
+        self.role_queue.close()
+        self.image_pool.close()
+        await super().close()
+        # Cogs unload inside super().close() and may still mark settings dirty; persist after that
+        self.settings_store.flush()
+        if self.session:
+            await self.session.close()
+        self.db_manager.close()
+
     async def get_dynamic_activity(self):
         try:
             server_count = len(self.guilds)
@@ -260,7 +280,7 @@ class CharacterBot(commands.Bot):
         # IMPORTANT: Sync the app command tree
         try:
             # Global sync
-            if bot_config['bot_settings']['auto_sync_commands']:
+            if self.bot_config['bot_settings']['auto_sync_commands']:
                 cmds = await self.tree.sync()
                 logger.info(f"App commands synced globally: {len(cmds)}")
         except Exception as e:
@@ -276,75 +296,87 @@ class CharacterBot(commands.Bot):
         except Exception as e:
             logger.error(f"Guild sync failed: {e}")
 
-bot = CharacterBot()
-
-@bot.event
-async def on_ready():
-    await bot.setup_log_channel()
-    logger.info(f'🚀 {bot.user} has awakened!')
-    if not bot.update_activity.is_running() and bot_config['bot_settings']['status_rotation']:
-        bot.update_activity.start()
+    async def on_ready(self):
+        await self.setup_log_channel()
+        logger.info(f'🚀 {self.user} has awakened!')
+        if not self.update_activity.is_running() and self.bot_config['bot_settings']['status_rotation']:
+            self.update_activity.start()
     
-    # Re-sync on ready in case it was missed during setup_hook
-    # Only syncs if auto_sync is enabled and sync wasn't successful before
-    if bot_config['bot_settings']['auto_sync_commands']:
-        try:
-            synced = await bot.tree.sync()
-            logger.info(f"Synced {len(synced)} command(s)")
-        except Exception as e:
-            logger.error(f"Failed to sync commands on ready: {e}")
+        # Re-sync on ready in case it was missed during setup_hook
+        # Only syncs if auto_sync is enabled and sync wasn't successful before
+        if self.bot_config['bot_settings']['auto_sync_commands']:
+            try:
+                synced = await self.tree.sync()
+                logger.info(f"Synced {len(synced)} command(s)")
+            except Exception as e:
+                logger.error(f"Failed to sync commands on ready: {e}")
     
-    logger.info("🎭 All premium features initialized")
+        logger.info("🎭 All premium features initialized")
 
-@bot.event
-async def on_message(message: discord.Message):
-    if message.author.bot or not message.guild:
-        return
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or not message.guild:
+            return
 
-    await bot.process_commands(message)
+        await self.process_commands(message)
 
-    if message.content.startswith(bot.command_prefix):
-        bot.bot_stats['commands_used'] += 1
-        return
+        if message.content.startswith(self.command_prefix):
+            self.bot_stats['commands_used'] += 1
+            return
     
 
-@bot.event
-async def on_command_error(ctx, error):
-    """Global error handler for all commands"""
-    if isinstance(error, commands.CommandNotFound):
-        print("Unknown command invoked.", ctx.command)
-        return  # Silently ignore unknown commands
+    async def on_command_error(self, ctx, error):
+        """Global error handler for all commands"""
+        if isinstance(error, commands.CommandNotFound):
+            print("Unknown command invoked.", ctx.command)
+            return  # Silently ignore unknown commands
     
-    elif isinstance(error, commands.MissingRequiredArgument):
-        embed = discord.Embed(
-            title="❌ Missing Arguments",
-            description=f"**Usage:** `{ctx.prefix}{ctx.command.qualified_name}`\n\n"
-                       f"Missing: `{error.param.name}`\n"
-                       f"**Example:** `{ctx.prefix}{ctx.command} 123456 ultra 30`",
-            color=discord.Color.red()
-        )
-        await ctx.send(embed=embed)
+        elif isinstance(error, commands.MissingRequiredArgument):
+            embed = discord.Embed(
+                title="❌ Missing Arguments",
+                description=f"**Usage:** `{ctx.prefix}{ctx.command.qualified_name}`\n\n"
+                           f"Missing: `{error.param.name}`\n"
+                           f"**Example:** `{ctx.prefix}{ctx.command} 123456 ultra 30`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
     
-    elif isinstance(error, commands.MissingPermissions):
-        await ctx.send("❌ Missing permissions! You need `Manage Roles` or higher.")
+        elif isinstance(error, commands.MissingPermissions):
+            await ctx.send("❌ Missing permissions! You need `Manage Roles` or higher.")
     
-    elif isinstance(error, commands.MissingRole):
-        await ctx.send("❌ Missing required role!")
+        elif isinstance(error, commands.MissingRole):
+            await ctx.send("❌ Missing required role!")
     
-    elif isinstance(error, commands.CheckFailure):
-        await ctx.send("❌ You don't have access to this command!")
+        elif isinstance(error, commands.CheckFailure):
+            await ctx.send("❌ You don't have access to this command!")
     
-    elif isinstance(error, commands.CommandOnCooldown):
-        await ctx.send(f"⏳ Slow down! Try again in **{error.retry_after:.1f}s**")
+        elif isinstance(error, commands.CommandOnCooldown):
+            await ctx.send(f"⏳ Slow down! Try again in **{error.retry_after:.1f}s**")
     
-    elif isinstance(error, commands.MaxConcurrencyReached):
-        await ctx.send("⚠️ This command is already running!")
-    else:
-        logger.error(f"Error in command '{ctx.command}': {error}")
-        await ctx.send("❌ An unexpected error occurred. The issue has been logged.")
+        elif isinstance(error, commands.MaxConcurrencyReached):
+            await ctx.send("⚠️ This command is already running!")
+        else:
+            logger.error(f"Error in command '{ctx.command}': {error}")
+            await ctx.send("❌ An unexpected error occurred. The issue has been logged.")
+
+def main():
+    # Process-wide setup lives here, not at import time: image worker processes re-import this module
+    # --- Set up stdout/stderr encoding (from your original code) ---
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    # --- Logging setup ---
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-if __name__ == "__main__":
     if not DISCORD_TOKEN:
         logger.critical("Missing DISCORD_TOKEN")
         raise SystemExit(1)
-    bot.run(DISCORD_TOKEN)
\ No newline at end of file
+    try:
+        bot = CharacterBot(load_config())
+    except (KeyError, ValueError) as e:
+        logger.critical(f"Error reading values from bot_config.json: {e}")
+        raise SystemExit(1)
+    bot.run(DISCORD_TOKEN)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
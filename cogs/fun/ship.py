@@ -5,13 +5,16 @@ import random
 import hashlib
 from datetime import datetime
 import logging
-from PIL import Image, ImageDraw, ImageFont
+import asyncio
 import io
-import aiohttp
-import math
-import os
 import re
 from typing import Optional, Tuple
+from utils.asset_fetcher import AssetFetcher
+from utils.image_worker import ImageWorkerBusy
+from utils.result_cache import ResultCache
+from utils.ship_render import RENDER_VERSION, color_for_percentage, render_ship
+
+AVATAR_FETCH_SIZE = 256
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,8 @@ logger = logging.getLogger(__name__)
 class Ship(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Finished cards; the same pair, avatars and names always render the same image
+        self.results = ResultCache("data/ship_cache")
 
         # Map percentages to emoji
         self.percentage_emojis = {
@@ -100,79 +105,29 @@ class Ship(commands.Cog):
         return (name1[:mid1] + name2[mid2:]).title()
 
     def get_color_from_percentage(self, percentage: int) -> tuple:
-        if percentage <= 20:
-            return (100, 100, 120)
-        elif percentage <= 40:
-            return (200, 100, 50)
-        elif percentage <= 60:
-            return (220, 180, 50)
-        elif percentage <= 80:
-            return (230, 120, 150)
-        else:
-            return (200, 50, 120)
-
-    def get_font(self, size: int):
-        font_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../DejaVuSans-Bold.ttf"))
-        try:
-            return ImageFont.truetype(font_path, size)
-        except Exception:
-            return ImageFont.load_default()
+        return color_for_percentage(percentage)
 
     # -------------------------
     # Avatar / image helpers
     # -------------------------
-    async def download_avatar(self, url: str) -> Optional[Image.Image]:
-        """Download avatar from url; return PIL Image or None on failure."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(str(url)) as resp:
-                    if resp.status == 200:
-                        data = await resp.read()
-                        return Image.open(io.BytesIO(data)).convert('RGBA')
-        except Exception as e:
-            logger.exception("Failed to download avatar: %s", e)
-        return None
-
-    def make_circle(self, img: Image.Image, size: int) -> Image.Image:
-        img = img.resize((size, size), getattr(Image, "Resampling", Image).LANCZOS)
-        mask = Image.new('L', (size, size), 0)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((0, 0, size, size), fill=255)
-        output = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        output.paste(img, (0, 0))
-        output.putalpha(mask)
-        return output
-
-    def draw_heart(self, draw: ImageDraw.Draw, x: int, y: int, size: int, color: tuple):
-        points = []
-        for angle in range(0, 360, 2):
-            rad = math.radians(angle)
-            heart_x = size * (16 * math.sin(rad) ** 3)
-            heart_y = -size * (13 * math.cos(rad) - 5 * math.cos(2 * rad) - 2 * math.cos(3 * rad) - math.cos(4 * rad))
-            points.append((x + heart_x, y + heart_y))
-        draw.polygon(points, fill=color)
-
-    def create_text_avatar(self, text: str, size: int = 180) -> Image.Image:
-        """Create a colored avatar with text initial"""
-        text_hash = hashlib.md5(text.encode()).hexdigest()
-        r = int(text_hash[:2], 16)
-        g = int(text_hash[2:4], 16)
-        b = int(text_hash[4:6], 16)
-
-        img = Image.new('RGBA', (size, size), (r, g, b, 255))
-        draw = ImageDraw.Draw(img)
-
-        initial = text[0].upper() if text else "?"
-        font = self.get_font(size // 2)
-
-        bbox = draw.textbbox((0, 0), initial, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-
-        position = ((size - text_width) // 2 - bbox[0], (size - text_height) // 2 - bbox[1])
-        draw.text(position, initial, font=font, fill=(255, 255, 255))
-
-        return img
+    async def fetch_avatar(self, member: Optional[discord.Member]) -> Tuple[Optional[str], Optional[bytes]]:
+        """(cache key, bytes) of a member's avatar at render size; (None, None) for plain-text names."""
+        if member is None:
+            return None, None
+        return await self.bot.assets.fetch_avatar(member.display_avatar, size=AVATAR_FETCH_SIZE)
+
+    def result_key(self, name1: str, name2: str, member1: Optional[discord.Member],
+                   member2: Optional[discord.Member], percentage: int) -> tuple:
+        """Everything the card depends on. Sides stay in order: the card isn't symmetric."""
+        sides = tuple(
+            (
+                member.id if member else None,
+                AssetFetcher.avatar_key(member.display_avatar, AVATAR_FETCH_SIZE) if member else None,
+                name,
+            )
+            for member, name in ((member1, name1), (member2, name2))
+        )
+        return ("ship", RENDER_VERSION, sides, percentage)
 
     async def create_ship_image(
         self,
@@ -182,106 +137,21 @@ class Ship(commands.Cog):
         member2: Optional[discord.Member],
         percentage: int
     ) -> io.BytesIO:
-        """Create the ship image. We accept member objects optionally but rely on name strings for text."""
-        width, height = 900, 350
-        bg_color = self.get_color_from_percentage(percentage)
-        img = Image.new('RGB', (width, height), bg_color)
-        draw = ImageDraw.Draw(img)
-
-        # subtle vertical gradient
-        for y in range(height):
-            progress = y / height
-            r = int(bg_color[0] + (255 - bg_color[0]) * progress * 0.3)
-            g = int(bg_color[1] + (255 - bg_color[1]) * progress * 0.3)
-            b = int(bg_color[2] + (255 - bg_color[2]) * progress * 0.3)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
-
-        avatar_size = 180
-
-        # avatar1: prefer member1 avatar if present, else text avatar
-        avatar1_img = None
-        if member1:
-            try:
-                avatar1_img = await self.download_avatar(member1.display_avatar.url)
-            except Exception:
-                avatar1_img = None
-        if avatar1_img is None:
-            avatar1_img = self.create_text_avatar(name1, avatar_size)
-
-        circle1 = self.make_circle(avatar1_img, avatar_size)
-        border_size = avatar_size + 10
-        border = Image.new('RGBA', (border_size, border_size), (0, 0, 0, 0))
-        border_draw = ImageDraw.Draw(border)
-        border_draw.ellipse((0, 0, border_size, border_size), fill=(255, 255, 255, 255))
-        img.paste(border, (70 - 5, 85 - 5), border)
-        img.paste(circle1, (70, 85), circle1)
-
-        # avatar2: prefer member2 avatar if present, else text avatar
-        avatar2_img = None
-        if member2:
-            try:
-                avatar2_img = await self.download_avatar(member2.display_avatar.url)
-            except Exception:
-                avatar2_img = None
-        if avatar2_img is None:
-            avatar2_img = self.create_text_avatar(name2, avatar_size)
-
-        circle2 = self.make_circle(avatar2_img, avatar_size)
-        border2 = Image.new('RGBA', (border_size, border_size), (0, 0, 0, 0))
-        border_draw2 = ImageDraw.Draw(border2)
-        border_draw2.ellipse((0, 0, border_size, border_size), fill=(255, 255, 255, 255))
-        img.paste(border2, (650 - 5, 85 - 5), border2)
-        img.paste(circle2, (650, 85), circle2)
-
-        # heart and percentage text
-        heart_size = 5 + int(percentage * 0.15)
-        self.draw_heart(draw, width // 2, height // 2, heart_size, (255, 100, 150))
-
-        font_large = self.get_font(100)
-        font_small = self.get_font(42)
-
-        percentage_text = f"{percentage}%"
-        bbox = draw.textbbox((0, 0), percentage_text, font=font_large)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        text_x = (width - text_width) // 2
-        text_y = (height - text_height) // 2 - 20
-        for dx in range(-3, 4):
-            for dy in range(-3, 4):
-                if dx or dy:
-                    draw.text((text_x + dx, text_y + dy), percentage_text, font=font_large, fill=(0, 0, 0, 180))
-        draw.text((text_x, text_y), percentage_text, font=font_large, fill=(255, 255, 255))
-
-        # names
-        display_name_1 = (member1.display_name if member1 else name1)[:12]
-        display_name_2 = (member2.display_name if member2 else name2)[:12]
-
-        bbox1 = draw.textbbox((0, 0), display_name_1, font=font_small)
-        bbox2 = draw.textbbox((0, 0), display_name_2, font=font_small)
-        name1_width = bbox1[2] - bbox1[0]
-        name2_width = bbox2[2] - bbox2[0]
-        name1_x = 160 - name1_width // 2
-        name2_x = 740 - name2_width // 2
-        name_y = 285
-        for dx in range(-2, 3):
-            for dy in range(-2, 3):
-                if dx or dy:
-                    draw.text((name1_x + dx, name_y + dy), display_name_1, font=font_small, fill=(0, 0, 0, 180))
-                    draw.text((name2_x + dx, name_y + dy), display_name_2, font=font_small, fill=(0, 0, 0, 180))
-        draw.text((name1_x, name_y), display_name_1, font=font_small, fill=(255, 255, 255))
-        draw.text((name2_x, name_y), display_name_2, font=font_small, fill=(255, 255, 255))
-
-        # sparkles for high %
-        if percentage >= 80:
-            sparkle_positions = [(150, 50), (750, 50), (150, 300), (750, 300)]
-            for pos in sparkle_positions:
-                draw.line([(pos[0] - 10, pos[1]), (pos[0] + 10, pos[1])], fill=(255, 255, 255), width=3)
-                draw.line([(pos[0], pos[1] - 10), (pos[0], pos[1] + 10)], fill=(255, 255, 255), width=3)
-
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        return buffer
+        """Create the ship image: from the result cache, else fetch avatars and render in the image worker pool."""
+        result_key = self.result_key(name1, name2, member1, member2, percentage)
+        cached = await self.results.get(result_key)
+        if cached is not None:
+            return io.BytesIO(cached)
+
+        (key1, avatar1), (key2, avatar2) = await asyncio.gather(
+            self.fetch_avatar(member1),
+            self.fetch_avatar(member2),
+        )
+        data = await self.bot.image_pool.run(render_ship, avatar1, avatar2, name1, name2, percentage, key1, key2)
+        # A failed avatar download falls back to an initial; don't keep that card under the avatar's key
+        if (member1 is None or avatar1) and (member2 is None or avatar2):
+            await self.results.put(result_key, data)
+        return io.BytesIO(data)
 
     # -------------------------
     # Helpers for resolving input
@@ -316,14 +186,11 @@ class Ship(commands.Cog):
             if member:
                 return member, member.display_name
 
-        # try exact name or nick (case-insensitive)
-        lower = value.lower()
+        # try exact name, global name or nick (case-insensitive)
         if ctx.guild:
-            for m in ctx.guild.members:
-                if m.bot:
-                    continue
-                if m.display_name.lower() == lower or m.name.lower() == lower:
-                    return m, m.display_name
+            member = self.bot.member_index.find(ctx.guild, value)
+            if member:
+                return member, member.display_name
 
         # not found as a Member -> treat as plain text
         return None, value
@@ -331,8 +198,7 @@ class Ship(commands.Cog):
     def _get_random_member(self, ctx: commands.Context) -> Optional[discord.Member]:
         if not ctx.guild:
             return None
-        members = [m for m in ctx.guild.members if not m.bot and m != ctx.author]
-        return random.choice(members) if members else None
+        return self.bot.member_index.random_human(ctx.guild, exclude=ctx.author.id)
 
     # -------------------------
     # Command
@@ -436,6 +302,9 @@ class Ship(commands.Cog):
         # create the image using name strings and optional member objects for avatars
         try:
             ship_image = await self.create_ship_image(final_name1, final_name2, member1, member2, percentage)
+        except ImageWorkerBusy:
+            await ctx.send("⏳ Lots of ships are being drawn right now, try again in a moment!", ephemeral=True)
+            return
         except Exception as e:
             logger.exception("Failed to create ship image: %s", e)
             await ctx.send("❌ Failed to generate ship image.", ephemeral=True)
@@ -43,56 +43,45 @@ class GameStats(commands.Cog):
         stats = {}
         
         try:
-            # Proper context manager usage for SQLite connection
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                # Set row factory for easier data access
-                conn.row_factory = sqlite3.Row
-                cur = conn.cursor()
-                
-                # Check if game_sessions table exists
-                cur.execute('''
-                    SELECT name FROM sqlite_master 
-                    WHERE type='table' AND name='game_sessions'
-                ''')
-                
-                if not cur.fetchone():
-                    await interaction.response.send_message(
-                        embed=discord.Embed(
-                            title="❌ Game Table Not Found",
-                            description="The game sessions table doesn't exist in the database.\n"
-                                       "Play some games first to create stats!",
-                            color=discord.Color.orange()
-                        ),
-                        ephemeral=True
-                    )
-                    return
-                
-                # Fetch game statistics
-                cur.execute('''
-                    SELECT 
-                        game_type, 
-                        COUNT(*) as games_played, 
-                        MAX(score) as best_score, 
-                        AVG(score) as avg_score,
-                        MIN(score) as worst_score,
-                        SUM(score) as total_score
-                    FROM game_sessions
-                    WHERE user_id = ?
-                    GROUP BY game_type
-                    ORDER BY games_played DESC
-                ''', (user_id,))
-                
-                rows = cur.fetchall()
-                
-                for row in rows:
-                    game_type = row['game_type']
-                    stats[game_type] = {
-                        "games": row['games_played'] or 0,
-                        "best": row['best_score'] or 0,
-                        "worst": row['worst_score'] or 0,
-                        "avg": round(row['avg_score'] or 0, 2),
-                        "total": row['total_score'] or 0
-                    }
+            db = self.bot.db_manager
+            
+            # Check if game_sessions table exists
+            if not await db.table_exists('game_sessions'):
+                await interaction.response.send_message(
+                    embed=discord.Embed(
+                        title="❌ Game Table Not Found",
+                        description="The game sessions table doesn't exist in the database.\n"
+                                   "Play some games first to create stats!",
+                        color=discord.Color.orange()
+                    ),
+                    ephemeral=True
+                )
+                return
+            
+            # Fetch game statistics
+            rows = await db.fetchall('''
+                SELECT 
+                    game_type, 
+                    COUNT(*) as games_played, 
+                    MAX(score) as best_score, 
+                    AVG(score) as avg_score,
+                    MIN(score) as worst_score,
+                    SUM(score) as total_score
+                FROM game_sessions
+                WHERE user_id = ?
+                GROUP BY game_type
+                ORDER BY games_played DESC
+            ''', (user_id,))
+            
+            for row in rows:
+                game_type = row['game_type']
+                stats[game_type] = {
+                    "games": row['games_played'] or 0,
+                    "best": row['best_score'] or 0,
+                    "worst": row['worst_score'] or 0,
+                    "avg": round(row['avg_score'] or 0, 2),
+                    "total": row['total_score'] or 0
+                }
                     
         except sqlite3.DatabaseError as e:
             logger.error(f"Database error fetching game stats for user {user_id}: {e}")
@@ -213,83 +202,79 @@ class GameStats(commands.Cog):
             limit = 10
         
         try:
-            with sqlite3.connect(self.bot.db_manager.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cur = conn.cursor()
-                
-                if game_type:
-                    # Specific game type leaderboard
-                    cur.execute('''
-                        SELECT 
-                            user_id,
-                            COUNT(*) as games,
-                            MAX(score) as best_score,
-                            AVG(score) as avg_score,
-                            SUM(score) as total_score
-                        FROM game_sessions
-                        WHERE game_type = ?
-                        GROUP BY user_id
-                        ORDER BY best_score DESC, avg_score DESC
-                        LIMIT ?
-                    ''', (game_type, limit))
-                    
-                    title = f"🏆 {game_type.replace('_', ' ').title()} Leaderboard"
-                else:
-                    # Overall leaderboard
-                    cur.execute('''
-                        SELECT 
-                            user_id,
-                            COUNT(*) as games,
-                            MAX(score) as best_score,
-                            AVG(score) as avg_score,
-                            SUM(score) as total_score
-                        FROM game_sessions
-                        GROUP BY user_id
-                        ORDER BY total_score DESC, best_score DESC
-                        LIMIT ?
-                    ''', (limit,))
-                    
-                    title = "🏆 Overall Game Leaderboard"
-                
-                rows = cur.fetchall()
+            db = self.bot.db_manager
+            
+            if game_type:
+                # Specific game type leaderboard
+                rows = await db.fetchall('''
+                    SELECT 
+                        user_id,
+                        COUNT(*) as games,
+                        MAX(score) as best_score,
+                        AVG(score) as avg_score,
+                        SUM(score) as total_score
+                    FROM game_sessions
+                    WHERE game_type = ?
+                    GROUP BY user_id
+                    ORDER BY best_score DESC, avg_score DESC
+                    LIMIT ?
+                ''', (game_type, limit))
                 
-                if not rows:
-                    await interaction.response.send_message(
-                        embed=discord.Embed(
-                            title="📊 No Leaderboard Data",
-                            description="No game data found for leaderboard.",
-                            color=discord.Color.orange()
-                        ),
-                        ephemeral=True
-                    )
-                    return
+                title = f"🏆 {game_type.replace('_', ' ').title()} Leaderboard"
+            else:
+                # Overall leaderboard
+                rows = await db.fetchall('''
+                    SELECT 
+                        user_id,
+                        COUNT(*) as games,
+                        MAX(score) as best_score,
+                        AVG(score) as avg_score,
+                        SUM(score) as total_score
+                    FROM game_sessions
+                    GROUP BY user_id
+                    ORDER BY total_score DESC, best_score DESC
+                    LIMIT ?
+                ''', (limit,))
                 
-                embed = discord.Embed(
-                    title=title,
-                    description=f"Top {len(rows)} players",
-                    color=discord.Color.gold(),
-                    timestamp=discord.utils.utcnow()
+                title = "🏆 Overall Game Leaderboard"
+            
+            if not rows:
+                await interaction.response.send_message(
+                    embed=discord.Embed(
+                        title="📊 No Leaderboard Data",
+                        description="No game data found for leaderboard.",
+                        color=discord.Color.orange()
+                    ),
+                    ephemeral=True
                 )
+                return
+            
+            embed = discord.Embed(
+                title=title,
+                description=f"Top {len(rows)} players",
+                color=discord.Color.gold(),
+                timestamp=discord.utils.utcnow()
+            )
+            
+            leaderboard_text = ""
+            medals = ["🥇", "🥈", "🥉"]
+            
+            for i, row in enumerate(rows):
+                try:
+                    user = self.bot.get_user(int(row['user_id']))
+                    username = user.display_name if user else f"User {row['user_id']}"
+                except:
+                    username = f"User {row['user_id']}"
                 
-                leaderboard_text = ""
-                medals = ["🥇", "🥈", "🥉"]
-                
-                for i, row in enumerate(rows):
-                    try:
-                        user = self.bot.get_user(int(row['user_id']))
-                        username = user.display_name if user else f"User {row['user_id']}"
-                    except:
-                        username = f"User {row['user_id']}"
-                    
-                    medal = medals[i] if i < 3 else f"{i+1}."
-                    
-                    leaderboard_text += f"{medal} **{username}**\n"
-                    leaderboard_text += f"    Games: {row['games']} | Best: {row['best_score']} | Avg: {round(row['avg_score'], 1)}\n\n"
-                
-                embed.description = f"Top {len(rows)} players\n\n{leaderboard_text}"
-                
-                await interaction.response.send_message(embed=embed)
+                medal = medals[i] if i < 3 else f"{i+1}."
                 
+                leaderboard_text += f"{medal} **{username}**\n"
+                leaderboard_text += f"    Games: {row['games']} | Best: {row['best_score']} | Avg: {round(row['avg_score'], 1)}\n\n"
+            
+            embed.description = f"Top {len(rows)} players\n\n{leaderboard_text}"
+            
+            await interaction.response.send_message(embed=embed)
+            
         except Exception as e:
             logger.error(f"Error fetching leaderboard: {e}")
             await interaction.response.send_message(
@@ -41,25 +41,15 @@ class BotInfo(commands.Cog):
         except:
             mem_mb = cpu_percent = 0
 
-        # ✅ FIXED PREMIUM CHECK - Multiple fallback methods
+        # Premium count: one in-memory lookup per guild via the shared PremiumService
         premium_servers = 0
         try:
-            # Your Vanity cog method (PREFERRED)
-            if hasattr(self.bot, 'get_cog') and self.bot.get_cog('Vanity'):
-                vanity_cog = self.bot.get_cog('Vanity')
-                premium_servers = sum(1 for guild in self.bot.guilds if vanity_cog.is_premium(guild.id))
-
-            # Fallback: Direct JSON check
-            elif os.path.exists("data/premium.json"):
-                import json
-                with open("data/premium.json", 'r') as f:
-                    data = json.load(f)
-                premium_servers = len([gid for gid in data.get("subscriptions", {}) 
-                                     if data["subscriptions"][gid].get("expires_at") is None or 
-                                     datetime.fromisoformat(data["subscriptions"][gid]["expires_at"]) > datetime.now()])
-
-            # Fallback: Count 0
-        except:
+            premium = getattr(self.bot, 'premium', None)
+            if premium:
+                premium_servers = premium.count_premium(guild.id for guild in self.bot.guilds)
+            else:
+                premium_servers = sum(1 for guild in self.bot.guilds if self.bot.is_premium_guild(guild.id))
+        except Exception:
             premium_servers = 0
 
         total_users = sum(g.member_count or 0 for g in self.bot.guilds)
@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import random
 import logging
 logger = logging.getLogger(__name__)
 class RandomAvatarView(discord.ui.View):
@@ -78,14 +77,12 @@ class RandomAvatar(commands.Cog):
         # Use ctx.defer() for hybrid commands
         await ctx.defer()
         
-        # Get all non-bot members. Note: for larger servers, ctx.guild.members might not have all members cached.
-        members = [m for m in ctx.guild.members if not m.bot]
-        if not members:
+        # Pick a random non-bot member from the shared index. Note: for larger servers, not every member may be cached.
+        user = self.bot.member_index.random_human(ctx.guild)
+        if not user:
             # ctx.reply() works for both slash and prefix commands
             await ctx.reply("❌ I couldn't find any eligible members!", ephemeral=True)
             return
-            
-        user = random.choice(members)
         
         # Pass the bot object to the view
         view = RandomAvatarView(user, self.bot)
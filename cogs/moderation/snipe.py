@@ -1,13 +1,17 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime
 import typing
 import logging
-from collections import deque
+import time
+from utils.config import SNIPE_PERSISTENCE, SNIPE_RETENTION_HOURS
+from utils.snipe_store import CachedMessage, RecentMessageCache, SnipeRecord, SnipeStore
 
 logger = logging.getLogger(__name__)
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
 
 class SnipeView(discord.ui.View):
     """Pagination view for snipe history"""
@@ -25,23 +29,23 @@ class SnipeView(discord.ui.View):
         
         if self.snipe_type == "deleted":
             embed = discord.Embed(
-                description=snipe["content"] or "*No text content*",
+                description=snipe.content or "*No text content*",
                 color=discord.Color.red(),
-                timestamp=snipe["timestamp"]
+                timestamp=snipe.timestamp
             )
-            embed.set_author(name=f"{snipe['author']}", icon_url=snipe["avatar_url"])
+            embed.set_author(name=snipe.author_name, icon_url=snipe.avatar_url)
             embed.set_footer(text=f"Deleted in #{self.channel_name} • Message {self.current_page + 1}/{self.max_pages}")
             
-            if snipe["attachments"]:
-                embed.add_field(name="📎 Attachments", value="\n".join(snipe["attachments"]), inline=False)
+            if snipe.attachments:
+                embed.add_field(name="📎 Attachments", value="\n".join(snipe.attachments), inline=False)
                 # Set image if first attachment is an image
-                if snipe["attachments"] and any(snipe["attachments"][0].lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp']):
-                    embed.set_image(url=snipe["attachments"][0])
+                if any(snipe.attachments[0].lower().endswith(ext) for ext in IMAGE_EXTENSIONS):
+                    embed.set_image(url=snipe.attachments[0])
         else:  # edited
-            embed = discord.Embed(color=discord.Color.orange(), timestamp=snipe["timestamp"])
-            embed.set_author(name=f"{snipe['author']}", icon_url=snipe["avatar_url"])
-            embed.add_field(name="📝 Before", value=snipe["before"] or "*No text content*", inline=False)
-            embed.add_field(name="✏️ After", value=snipe["after"] or "*No text content*", inline=False)
+            embed = discord.Embed(color=discord.Color.orange(), timestamp=snipe.timestamp)
+            embed.set_author(name=snipe.author_name, icon_url=snipe.avatar_url)
+            embed.add_field(name="📝 Before", value=snipe.content or "*No text content*", inline=False)
+            embed.add_field(name="✏️ After", value=snipe.after or "*No text content*", inline=False)
             embed.set_footer(text=f"Edited in #{self.channel_name} • Edit {self.current_page + 1}/{self.max_pages}")
         
         return embed
@@ -83,92 +87,149 @@ class Snipe(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.max_snipes = 10  # Maximum messages to store per channel
-        self.snipes = {}  # Store deleted messages per channel
-        self.edit_snipes = {}  # Store edited messages per channel
-        self.reaction_snipes = {}  # Store removed reactions per channel
+        # Deleted / edited / removed-reaction history, bounded per channel, per guild and globally
+        self.store = SnipeStore(per_channel=self.max_snipes)
+        # Our own compact copy of recent message content; the library message cache isn't needed
+        self.recent = RecentMessageCache(per_channel=50)
+        # Optional durable copy in SQLite; memory stays the hot read path
+        self.persist = False
+        self.persist_ttl = SNIPE_RETENTION_HOURS * 3600
+    
+    async def cog_load(self):
+        db = getattr(self.bot, 'db_manager', None)
+        self.persist = SNIPE_PERSISTENCE and bool(db and db.enabled)
+        if SNIPE_PERSISTENCE and not self.persist:
+            logger.warning("SNIPE_PERSISTENCE is set but the database is disabled; snipes stay in memory only")
+        if self.persist:
+            await self.warm_store()
+        self.purge_expired.start()
+    
+    async def cog_unload(self):
+        self.purge_expired.cancel()
+    
+    async def warm_store(self):
+        """Refill the in-memory rings from SQLite after a restart"""
+        rows = await self.bot.db_manager.load_snipes(time.time() - self.store.ttl, self.store.max_entries)
+        for row in rows:
+            self.store.add(row['kind'], SnipeRecord.from_row(row))
+        if rows:
+            logger.info(f"Restored {len(rows)} snipe(s) from the database")
+    
+    async def _record(self, kind, record):
+        self.store.add(kind, record)
+        if self.persist:
+            await self.bot.db_manager.add_snipe(record.as_row(kind))
+    
+    @tasks.loop(minutes=10)
+    async def purge_expired(self):
+        removed = self.store.purge_expired()
+        if removed:
+            logger.debug(f"Purged {removed} expired snipe(s)")
+        if self.persist:
+            purged = await self.bot.db_manager.purge_snipes(time.time() - self.persist_ttl)
+            if purged:
+                logger.debug(f"Purged {purged} stored snipe(s) past retention")
+    
+    @staticmethod
+    def _avatar(user):
+        return user.avatar.url if user.avatar else user.default_avatar.url
+    
+    def _cache_entry(self, message):
+        return CachedMessage(
+            message.author.id, str(message.author), self._avatar(message.author), message.content,
+            attachments=[attachment.url for attachment in message.attachments],
+            sticker_count=len(message.stickers)
+        )
+    
+    def _deleted_record(self, guild_id, channel_id, message_id, entry):
+        return SnipeRecord(
+            message_id, guild_id, channel_id, entry.author_id, entry.author_name, entry.avatar_url,
+            content=entry.content,
+            attachments=entry.attachments,
+            sticker_count=entry.sticker_count
+        )
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message):
+    async def on_message(self, message):
+        """Remember recent message content for raw delete/edit events"""
+        if message.author.bot or not message.guild:
+            return
+        self.recent.put(message.channel.id, message.id, self._cache_entry(message))
+
+    async def _capture_deleted(self, guild_id, channel_id, message_id, cached_message=None):
+        entry = self.recent.pop(channel_id, message_id)
+        if entry is None and cached_message is not None and not cached_message.author.bot:
+            entry = self._cache_entry(cached_message)
+        if entry is not None:
+            await self._record("deleted", self._deleted_record(guild_id, channel_id, message_id, entry))
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
         """Track deleted messages"""
-        if message.author.bot:
+        if not payload.guild_id:
             return
-        
-        # Initialize deque for channel if not exists
-        if message.channel.id not in self.snipes:
-            self.snipes[message.channel.id] = deque(maxlen=self.max_snipes)
-        
-        snipe_data = {
-            "content": message.content,
-            "author": message.author,
-            "avatar_url": message.author.avatar.url if message.author.avatar else message.author.default_avatar.url,
-            "timestamp": datetime.now(),
-            "attachments": [attachment.url for attachment in message.attachments],
-            "stickers": [sticker.url for sticker in message.stickers] if message.stickers else [],
-            "message_id": message.id
-        }
-        
-        self.snipes[message.channel.id].appendleft(snipe_data)
+        await self._capture_deleted(payload.guild_id, payload.channel_id, payload.message_id, payload.cached_message)
 
     @commands.Cog.listener()
-    async def on_bulk_message_delete(self, messages):
+    async def on_raw_bulk_message_delete(self, payload):
         """Track bulk deleted messages"""
-        for message in messages:
-            if not message.author.bot:
-                if message.channel.id not in self.snipes:
-                    self.snipes[message.channel.id] = deque(maxlen=self.max_snipes)
-                
-                snipe_data = {
-                    "content": message.content,
-                    "author": message.author,
-                    "avatar_url": message.author.avatar.url if message.author.avatar else message.author.default_avatar.url,
-                    "timestamp": datetime.now(),
-                    "attachments": [attachment.url for attachment in message.attachments],
-                    "stickers": [sticker.url for sticker in message.stickers] if message.stickers else [],
-                    "message_id": message.id
-                }
-                
-                self.snipes[message.channel.id].appendleft(snipe_data)
+        if not payload.guild_id:
+            return
+        cached = {message.id: message for message in payload.cached_messages}
+        for message_id in sorted(payload.message_ids):
+            await self._capture_deleted(payload.guild_id, payload.channel_id, message_id, cached.get(message_id))
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before, after):
+    async def on_raw_message_edit(self, payload):
         """Track edited messages"""
-        if before.author.bot or before.content == after.content:
+        after = payload.message
+        if not payload.guild_id or after.author.bot:
             return
         
-        if before.channel.id not in self.edit_snipes:
-            self.edit_snipes[before.channel.id] = deque(maxlen=self.max_snipes)
+        entry = self.recent.get(payload.channel_id, payload.message_id)
+        if entry is not None:
+            before_content = entry.content
+        elif payload.cached_message is not None:
+            before_content = payload.cached_message.content
+        else:
+            return  # content before the edit is unknown
         
-        snipe_data = {
-            "before": before.content,
-            "after": after.content,
-            "author": before.author,
-            "avatar_url": before.author.avatar.url if before.author.avatar else before.author.default_avatar.url,
-            "timestamp": datetime.now(),
-            "message_id": before.id,
-            "jump_url": after.jump_url
-        }
+        if before_content == after.content:
+            return
         
-        self.edit_snipes[before.channel.id].appendleft(snipe_data)
+        await self._record("edited", SnipeRecord(
+            after.id, payload.guild_id, payload.channel_id, after.author.id,
+            str(after.author), self._avatar(after.author),
+            content=before_content,
+            after=after.content,
+            jump_url=after.jump_url
+        ))
+        if entry is not None:
+            entry.content = after.content
 
     @commands.Cog.listener()
-    async def on_reaction_remove(self, reaction, user):
+    async def on_raw_reaction_remove(self, payload):
         """Track removed reactions"""
-        if user.bot:
+        if not payload.guild_id:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        user = guild.get_member(payload.user_id) if guild else None
+        if user is None or user.bot:
             return
         
-        if reaction.message.channel.id not in self.reaction_snipes:
-            self.reaction_snipes[reaction.message.channel.id] = deque(maxlen=self.max_snipes)
-        
-        reaction_data = {
-            "emoji": str(reaction.emoji),
-            "user": user,
-            "avatar_url": user.avatar.url if user.avatar else user.default_avatar.url,
-            "message_content": reaction.message.content[:100] if reaction.message.content else "*No content*",
-            "message_author": reaction.message.author,
-            "timestamp": datetime.now()
-        }
-        
-        self.reaction_snipes[reaction.message.channel.id].appendleft(reaction_data)
+        entry = self.recent.get(payload.channel_id, payload.message_id)
+        content = entry.content[:100] if entry and entry.content else "*No content*"
+        await self._record("reaction", SnipeRecord(
+            payload.message_id, payload.guild_id, payload.channel_id, user.id,
+            str(user), self._avatar(user),
+            content=content,
+            emoji=str(payload.emoji),
+            target_name=entry.author_name if entry else "Unknown"
+        ))
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.recent.forget_channel(channel.id)
 
     @commands.hybrid_command(name="snipe", description="Shows recently deleted messages in a channel")
     @app_commands.describe(
@@ -189,11 +250,10 @@ class Snipe(commands.Cog):
         if channel != ctx.channel and not ctx.author.guild_permissions.manage_messages:
             return await ctx.send("❌ You need `Manage Messages` permission to snipe other channels!", ephemeral=True)
         
-        if channel.id not in self.snipes or len(self.snipes[channel.id]) == 0:
+        snipes_list = self.store.get("deleted", channel.id)
+        if not snipes_list:
             return await ctx.send(f"📭 There are no deleted messages to snipe in {channel.mention}!", ephemeral=True)
         
-        snipes_list = list(self.snipes[channel.id])
-        
         # Validate index
         if index < 1 or index > len(snipes_list):
             return await ctx.send(f"❌ Invalid index! Use a number between 1 and {len(snipes_list)}.", ephemeral=True)
@@ -206,20 +266,20 @@ class Snipe(commands.Cog):
         else:
             snipe = snipes_list[index - 1]
             embed = discord.Embed(
-                description=snipe["content"] or "*No text content*",
+                description=snipe.content or "*No text content*",
                 color=discord.Color.red(),
-                timestamp=snipe["timestamp"]
+                timestamp=snipe.timestamp
             )
-            embed.set_author(name=f"{snipe['author']}", icon_url=snipe["avatar_url"])
+            embed.set_author(name=snipe.author_name, icon_url=snipe.avatar_url)
             embed.set_footer(text=f"Deleted in #{channel.name} • Message {index}/{len(snipes_list)}")
             
-            if snipe["attachments"]:
-                embed.add_field(name="📎 Attachments", value="\n".join(snipe["attachments"]), inline=False)
-                if any(snipe["attachments"][0].lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp']):
-                    embed.set_image(url=snipe["attachments"][0])
+            if snipe.attachments:
+                embed.add_field(name="📎 Attachments", value="\n".join(snipe.attachments), inline=False)
+                if any(snipe.attachments[0].lower().endswith(ext) for ext in IMAGE_EXTENSIONS):
+                    embed.set_image(url=snipe.attachments[0])
             
-            if snipe["stickers"]:
-                embed.add_field(name="🎴 Stickers", value=f"{len(snipe['stickers'])} sticker(s)", inline=False)
+            if snipe.sticker_count:
+                embed.add_field(name="🎴 Stickers", value=f"{snipe.sticker_count} sticker(s)", inline=False)
             
             await ctx.send(embed=embed)
 
@@ -241,11 +301,10 @@ class Snipe(commands.Cog):
         if channel != ctx.channel and not ctx.author.guild_permissions.manage_messages:
             return await ctx.send("❌ You need `Manage Messages` permission to snipe other channels!", ephemeral=True)
         
-        if channel.id not in self.edit_snipes or len(self.edit_snipes[channel.id]) == 0:
+        snipes_list = self.store.get("edited", channel.id)
+        if not snipes_list:
             return await ctx.send(f"📭 There are no edited messages to snipe in {channel.mention}!", ephemeral=True)
         
-        snipes_list = list(self.edit_snipes[channel.id])
-        
         if index < 1 or index > len(snipes_list):
             return await ctx.send(f"❌ Invalid index! Use a number between 1 and {len(snipes_list)}.", ephemeral=True)
         
@@ -255,14 +314,14 @@ class Snipe(commands.Cog):
             await ctx.send(embed=embed, view=view)
         else:
             snipe = snipes_list[index - 1]
-            embed = discord.Embed(color=discord.Color.orange(), timestamp=snipe["timestamp"])
-            embed.set_author(name=f"{snipe['author']}", icon_url=snipe["avatar_url"])
-            embed.add_field(name="📝 Before", value=snipe["before"] or "*No text content*", inline=False)
-            embed.add_field(name="✏️ After", value=snipe["after"] or "*No text content*", inline=False)
+            embed = discord.Embed(color=discord.Color.orange(), timestamp=snipe.timestamp)
+            embed.set_author(name=snipe.author_name, icon_url=snipe.avatar_url)
+            embed.add_field(name="📝 Before", value=snipe.content or "*No text content*", inline=False)
+            embed.add_field(name="✏️ After", value=snipe.after or "*No text content*", inline=False)
             embed.set_footer(text=f"Edited in #{channel.name} • Edit {index}/{len(snipes_list)}")
             
-            if "jump_url" in snipe:
-                embed.add_field(name="🔗 Jump to Message", value=f"[Click here]({snipe['jump_url']})", inline=False)
+            if snipe.jump_url:
+                embed.add_field(name="🔗 Jump to Message", value=f"[Click here]({snipe.jump_url})", inline=False)
             
             await ctx.send(embed=embed)
 
@@ -273,20 +332,69 @@ class Snipe(commands.Cog):
         """Shows the last removed reaction in the channel"""
         channel = channel or ctx.channel
         
-        if channel.id not in self.reaction_snipes or len(self.reaction_snipes[channel.id]) == 0:
+        snipes_list = self.store.get("reaction", channel.id)
+        if not snipes_list:
             return await ctx.send(f"📭 There are no removed reactions to snipe in {channel.mention}!", ephemeral=True)
         
-        snipe = list(self.reaction_snipes[channel.id])[0]
+        snipe = snipes_list[0]
         embed = discord.Embed(
-            description=f"**Reaction:** {snipe['emoji']}\n**On message by:** {snipe['message_author']}\n**Message:** {snipe['message_content']}",
+            description=f"**Reaction:** {snipe.emoji}\n**On message by:** {snipe.target_name}\n**Message:** {snipe.content}",
             color=discord.Color.purple(),
-            timestamp=snipe["timestamp"]
+            timestamp=snipe.timestamp
         )
-        embed.set_author(name=f"Removed by {snipe['user']}", icon_url=snipe["avatar_url"])
+        embed.set_author(name=f"Removed by {snipe.author_name}", icon_url=snipe.avatar_url)
         embed.set_footer(text=f"Reaction removed in #{channel.name}")
         
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name="usersnipe", aliases=["usnipe"], description="Shows a member's recent deleted or edited messages across the server")
+    @app_commands.describe(
+        member="The member to look up",
+        kind="Deleted or edited messages",
+        limit="How many to show (max 25)"
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    async def usersnipe(
+        self,
+        ctx: commands.Context,
+        member: discord.Member,
+        kind: typing.Literal["deleted", "edited"] = "deleted",
+        limit: typing.Optional[int] = 10
+    ):
+        """Shows a member's recent snipes across every channel (requires Manage Messages)"""
+        limit = max(1, min(limit, 25))
+        if self.persist:
+            rows = await self.bot.db_manager.get_snipes(
+                ctx.guild.id, kind, author_id=member.id, since=time.time() - self.persist_ttl, limit=limit
+            )
+            snipes_list = [SnipeRecord.from_row(row) for row in rows]
+        else:
+            snipes_list = self.store.by_author(kind, ctx.guild.id, member.id, limit)
+        
+        if not snipes_list:
+            return await ctx.send(f"📭 No {kind} messages by {member.mention} to snipe!", ephemeral=True)
+        
+        embed = discord.Embed(
+            title=f"{'🗑️ Deleted' if kind == 'deleted' else '✏️ Edited'} messages by {member.display_name}",
+            color=discord.Color.red() if kind == "deleted" else discord.Color.orange()
+        )
+        for snipe in snipes_list:
+            text = snipe.content or "*No text content*"
+            if kind == "edited":
+                text = f"{text} → {snipe.after or '*No text content*'}"
+            if len(text) > 200:
+                text = text[:197] + "..."
+            embed.add_field(
+                name=f"<t:{int(snipe.ts)}:R>",
+                value=f"<#{snipe.channel_id}> • {text}",
+                inline=False
+            )
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.set_footer(text=f"{len(snipes_list)} result(s)")
+        
+        await ctx.send(embed=embed)
+
     @commands.hybrid_command(name="clearsnipes", description="Clear snipe history for a channel")
     @app_commands.describe(channel="The channel to clear (optional - clears current channel)")
     @commands.guild_only()
@@ -295,18 +403,9 @@ class Snipe(commands.Cog):
         """Clear snipe history for a channel (requires Manage Messages)"""
         channel = channel or ctx.channel
         
-        cleared_count = 0
-        if channel.id in self.snipes:
-            cleared_count += len(self.snipes[channel.id])
-            self.snipes[channel.id].clear()
-        
-        if channel.id in self.edit_snipes:
-            cleared_count += len(self.edit_snipes[channel.id])
-            self.edit_snipes[channel.id].clear()
-        
-        if channel.id in self.reaction_snipes:
-            cleared_count += len(self.reaction_snipes[channel.id])
-            self.reaction_snipes[channel.id].clear()
+        cleared_count = self.store.clear_channel(channel.id)
+        if self.persist:
+            await self.bot.db_manager.delete_snipes(ctx.guild.id, channel.id)
         
         embed = discord.Embed(
             description=f"✅ Cleared **{cleared_count}** sniped message(s) from {channel.mention}",
@@ -318,19 +417,24 @@ class Snipe(commands.Cog):
     @commands.guild_only()
     async def snipestats(self, ctx: commands.Context):
         """Display snipe statistics"""
-        total_deleted = sum(len(snipes) for channel_id, snipes in self.snipes.items() if ctx.guild.get_channel(channel_id))
-        total_edited = sum(len(snipes) for channel_id, snipes in self.edit_snipes.items() if ctx.guild.get_channel(channel_id))
-        total_reactions = sum(len(snipes) for channel_id, snipes in self.reaction_snipes.items() if ctx.guild.get_channel(channel_id))
+        stats = self.store.guild_stats(ctx.guild.id)
+        store = self.store
         
         embed = discord.Embed(
             title=f"📊 Snipe Statistics for {ctx.guild.name}",
             color=discord.Color.blue(),
             timestamp=datetime.now()
         )
-        embed.add_field(name="🗑️ Deleted Messages", value=f"``````", inline=True)
-        embed.add_field(name="✏️ Edited Messages", value=f"``````", inline=True)
-        embed.add_field(name="😮 Removed Reactions", value=f"``````", inline=True)
-        embed.add_field(name="⚙️ Max Per Channel", value=f"``````", inline=True)
+        embed.add_field(name="🗑️ Deleted Messages", value=f"```{stats['deleted']}```", inline=True)
+        embed.add_field(name="✏️ Edited Messages", value=f"```{stats['edited']}```", inline=True)
+        embed.add_field(name="😮 Removed Reactions", value=f"```{stats['reaction']}```", inline=True)
+        embed.add_field(name="⚙️ Max Per Channel", value=f"```{store.per_channel}```", inline=True)
+        embed.add_field(name="📁 Server Usage", value=f"```{stats['bytes'] / 1024:.1f} KB in {stats['channels']} channel(s), cap {store.per_guild} entries```", inline=False)
+        embed.add_field(name="🌐 Bot-wide Usage", value=f"```{store.entries}/{store.max_entries} entries, {store.bytes / 1024:.1f}/{store.max_bytes / 1024:.0f} KB, {store.evicted_channels} idle channel(s) evicted```", inline=False)
+        embed.add_field(name="🧾 Content Cache", value=f"```{len(self.recent)} recent message(s), {self.recent.per_channel} per channel```", inline=True)
+        embed.add_field(name="⏳ Retention", value=f"```{store.ttl / 3600:g} hours```", inline=True)
+        if self.persist:
+            embed.add_field(name="💾 Stored History", value=f"```SQLite, kept {self.persist_ttl / 3600:g} hours```", inline=True)
         embed.set_footer(text=f"Requested by {ctx.author.display_name}", icon_url=ctx.author.display_avatar.url)
         
         await ctx.send(embed=embed)
@@ -40,11 +40,18 @@ class Owner(commands.Cog):
     @commands.is_owner()
     async def activate(self, ctx, guild_id: str, tier: str):
         """!activate 123456789 ULTRA - Owner gives premium"""
-        data = self._get_data()
+        data = self.bot.premium.data()
         data["subscriptions"][guild_id] = {"tier": tier.upper(), "expires_at": None}
-        self._save_data(data)
+        self.bot.premium.save(data)
         await ctx.send(f"✅ **{tier}** activated for {guild_id}")
 
+    @commands.command(name="premium_reload")
+    @commands.is_owner()
+    async def premium_reload(self, ctx):
+        """!premium_reload - Re-read premium.json after editing it by hand"""
+        self.bot.premium.reload()
+        await ctx.send("✅ Premium data reloaded")
+
     @commands.hybrid_command(name="force_resync", description="Force resync all commands.")
     @is_owner()
     async def force_resync(self, ctx: commands.Context):
@@ -76,6 +83,47 @@ class Owner(commands.Cog):
         
         await ctx.followup.send("✅ Backup Created!", file=file, ephemeral=True)
 
+    @commands.hybrid_command(name="imagestats", description="Show image worker pool timings.")
+    @is_owner()
+    async def imagestats(self, ctx: commands.Context):
+        pool = self.bot.image_pool
+        try:
+            embed_color = int(self.bot.bot_config['ui_settings']['embed_color'], 16)
+        except (KeyError, ValueError):
+            embed_color = 0x0099ff
+
+        embed = discord.Embed(
+            title="🖼️ Image Workers",
+            description=f"Mode: **{pool.mode or 'not started'}** • Workers: **{pool.max_workers}**\n"
+                        f"Pending: **{pool.pending}/{pool.max_pending}** • Rejected (busy): **{pool.rejected}**",
+            color=embed_color
+        )
+        for name, job in pool.snapshot().items():
+            embed.add_field(
+                name=name,
+                value=f"{job['count']} ok / {job['failures']} failed\n"
+                      f"run avg {job['run_avg_ms']:.0f} ms (max {job['run_max_ms']:.0f})\n"
+                      f"queue avg {job['wait_avg_ms']:.0f} ms (max {job['wait_max_ms']:.0f})",
+                inline=True
+            )
+        assets = self.bot.assets.stats()
+        embed.add_field(
+            name="Asset cache",
+            value=f"{assets['entries']} item(s), {assets['bytes'] / 1024:.0f} KB\n"
+                  f"{assets['hits']} hits / {assets['misses']} downloads / {assets['coalesced']} coalesced",
+            inline=False
+        )
+        ship = self.bot.get_cog("Ship")
+        if ship:
+            results = ship.results.stats()
+            embed.add_field(
+                name="Ship result cache",
+                value=f"hit rate {results['hit_rate']:.0%} ({results['memory_hits']} memory / {results['disk_hits']} disk / {results['misses']} miss)\n"
+                      f"{results['memory_bytes'] / 1024:.0f} KB in memory, {results['disk_entries']} file(s) / {results['disk_bytes'] / 1024:.0f} KB on disk",
+                inline=False
+            )
+        await ctx.send(embed=embed, ephemeral=True)
+
     @commands.hybrid_command(name="resetstats", description="Reset bot statistics.")
     @is_owner()
     async def resetstats(self, ctx: commands.Context):
@@ -4,24 +4,24 @@ import os
 from discord.ext import commands, tasks
 from datetime import datetime
 import asyncio
+import logging
+from utils.trigger_matcher import TriggerMatcher
+
+logger = logging.getLogger(__name__)
 
 class Vanity(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.file = "data/premium.json"
+        # guild_id -> (roles dict, settings key, TriggerMatcher); rebuilt when triggers change
+        self._matchers = {}
 
     def _get_data(self):
-        """Always fresh data - fixes stale cache issue"""
-        if os.path.exists(self.file):
-            with open(self.file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"subscriptions": {}, "vanity": {"roles": {}, "settings": {}}, "grandfathered": []}
+        """Shared cached copy of premium.json (one parse for every cog)"""
+        return self.bot.premium.data()
 
     def _save_data(self, data):
-        """Save with proper encoding"""
-        os.makedirs(os.path.dirname(self.file), exist_ok=True)
-        with open(self.file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Queue premium.json for writing and re-index entitlements"""
+        self.bot.premium.save(data)
 
     def _update_data(self, update_func):
         """Helper to update data atomically"""
@@ -30,19 +30,8 @@ class Vanity(commands.Cog):
         self._save_data(data)
 
     def is_premium(self, guild_id):
-        """Self-contained premium check with fresh data"""
-        data = self._get_data()
-        gid = str(guild_id)
-        if int(gid) in data.get("grandfathered", []): return True
-        sub = data["subscriptions"].get(gid)
-        if not sub: return False
-        expires = sub.get("expires_at")
-        if expires and expires != "null":
-            try:
-                if datetime.fromisoformat(expires) < datetime.now():
-                    return False
-            except: pass
-        return True
+        """O(1) premium check backed by the shared PremiumService"""
+        return self.bot.premium.is_premium(guild_id)
 
     def get_vanity_roles(self, guild_id):
         data = self._get_data()
@@ -53,64 +42,124 @@ class Vanity(commands.Cog):
             if "vanity" not in data: data["vanity"] = {"roles": {}, "settings": {}}
             data["vanity"]["roles"][str(guild_id)] = roles
         self._update_data(update)
+        self._matchers.pop(str(guild_id), None)
 
     def get_vanity_settings(self, guild_id):
         data = self._get_data()
         return data["vanity"]["settings"].get(str(guild_id), {})
 
-    @tasks.loop(minutes=5)
+    # -------------------------
+    # Role engine
+    # -------------------------
+    @staticmethod
+    def custom_status(member):
+        return " ".join([a.name for a in member.activities
+                         if isinstance(a, discord.CustomActivity) and a.name])
+
+    def find_trigger(self, guild_id, roles, trigger):
+        """Stored key for ``trigger``; ignores case unless the guild matches case-sensitively"""
+        if trigger in roles:
+            return trigger
+        if self.get_vanity_settings(guild_id).get("case_sensitive", False):
+            return None
+        folded = trigger.lower()
+        return next((t for t in roles if t.lower() == folded), None)
+
+    def get_matcher(self, guild_id, roles):
+        """Compiled trigger automaton for a guild, cached until its triggers or settings change"""
+        gid = str(guild_id)
+        settings = self.get_vanity_settings(guild_id)
+        key = (
+            settings.get("match_mode", "substring"),
+            settings.get("priority_mode", "all_matches"),
+            bool(settings.get("case_sensitive", False)),
+            tuple(settings.get("enabled_triggers") or ()),
+            len(roles),
+        )
+        cached = self._matchers.get(gid)
+        if cached and cached[0] is roles and cached[1] == key:
+            return cached[2]
+
+        enabled = set(key[3])
+        triggers = [t for t in roles if not enabled or t in enabled]
+        matcher = TriggerMatcher(triggers, key[0], key[1], key[2])
+        self._matchers[gid] = (roles, key, matcher)
+        return matcher
+
+    def matching_triggers(self, guild_id, roles, status):
+        """Triggers matched by the status text, in priority order"""
+        return self.get_matcher(guild_id, roles).find(status)
+
+    def matching_role_ids(self, guild_id, roles, status):
+        """Role ids whose trigger matches the status text"""
+        return {int(roles[t]) for t in self.matching_triggers(guild_id, roles, status)}
+
+    async def sync_member(self, member, roles=None):
+        """Bring one member's vanity roles in line with their current custom status"""
+        roles = roles if roles is not None else self.get_vanity_roles(member.guild.id)
+        if not roles:
+            return
+
+        vanity_role_ids = {int(rid) for rid in roles.values()}
+        current_roles = {r.id for r in member.roles}
+        should_have = self.matching_role_ids(member.guild.id, roles, self.custom_status(member))
+
+        to_add = [r for r in (member.guild.get_role(rid) for rid in should_have - current_roles) if r]
+        to_remove = [r for r in (member.guild.get_role(rid) for rid in (current_roles & vanity_role_ids) - should_have) if r]
+
+        if to_add or to_remove:
+            # Coalesced into a single member.edit and paced per guild by the shared queue
+            self.bot.role_queue.submit(member, add=to_add, remove=to_remove, reason="Vanity status match")
+
+    async def sync_guild(self, guild):
+        """Full pass over a guild's online members (reconciliation / trigger changes)"""
+        if not self.is_premium(guild.id):
+            return
+        roles = self.get_vanity_roles(guild.id)
+        if not roles:
+            return
+        for i, member in enumerate([m for m in guild.members if not m.bot and m.status != discord.Status.offline]):
+            await self.sync_member(member, roles)
+            if i % 500 == 499:
+                await asyncio.sleep(0)  # yield to the gateway on very large guilds
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        """Re-evaluate only the member whose custom status changed"""
+        if after.bot or after.status == discord.Status.offline:
+            return
+        if self.custom_status(before) == self.custom_status(after):
+            return
+        if not self.is_premium(after.guild.id):
+            return
+        roles = self.get_vanity_roles(after.guild.id)
+        if roles:
+            await self.sync_member(after, roles)
+
+    @tasks.loop(minutes=30)
     async def check_task(self):
+        """Low-frequency safety net for presence events missed while offline/reconnecting"""
         for guild in self.bot.guilds:
-            if not self.is_premium(guild.id): continue
-            
-            roles = self.get_vanity_roles(guild.id)
-            if not roles: continue
-
-            vanity_role_ids = {int(rid) for rid in roles.values()}
-            
-            # Process only online/active members to save API calls
-            for member in [m for m in guild.members if not m.bot and m.status != discord.Status.offline]:
-                status = " ".join([a.name for a in member.activities 
-                                 if isinstance(a, discord.CustomActivity)])
-                
-                current_roles = {r.id for r in member.roles}
-                
-                # Find matching roles
-                should_have = set()
-                for trigger, role_id in roles.items():
-                    if trigger.lower() in status.lower():
-                        should_have.add(int(role_id))
-                
-                # Add missing roles
-                for role_id in should_have - current_roles:
-                    role = guild.get_role(role_id)
-                    if role and role not in member.roles:
-                        try:
-                            await member.add_roles(role, reason="Vanity status match")
-                            await asyncio.sleep(0.5)
-                        except: pass
-                
-                # Remove extra vanity roles
-                for role_id in current_roles & vanity_role_ids - should_have:
-                    role = guild.get_role(role_id)
-                    if role in member.roles:
-                        try:
-                            await member.remove_roles(role, reason="Vanity status changed")
-                            await asyncio.sleep(0.5)
-                        except: pass
+            try:
+                await self.sync_guild(guild)
+            except Exception as e:
+                logger.error(f"Vanity reconciliation failed for guild {guild.id}: {e}")
 
     @check_task.before_loop
     async def before_check(self):
         await self.bot.wait_until_ready()
 
+    async def cog_load(self):
+        self.check_task.start()
+
+    async def cog_unload(self):
+        self.check_task.cancel()
+
     @commands.command()
     @commands.has_permissions(manage_roles=True)
     async def vanity_add(self, ctx, trigger: str, *, role: discord.Role):
         """!vanity_add hello @Role"""
-        data = self._get_data()
-        gid = str(ctx.guild.id)
-        sub = data["subscriptions"].get(gid, {})
-        tier = sub.get("tier", "FREE")
+        tier = self.bot.premium.get_subscription_tier(ctx.guild.id)
 
         # ✅ TIER LIMITS
         role_limits = {
@@ -139,8 +188,13 @@ class Vanity(commands.Cog):
             return await ctx.send("❌ Role higher than my top role!")
 
         roles = self.get_vanity_roles(ctx.guild.id)
-        roles[trigger.lower()] = str(role.id)
+        # Keep the trigger's case so case-sensitive matching can use it; the matcher folds it otherwise
+        existing = self.find_trigger(ctx.guild.id, roles, trigger)
+        if existing is not None:
+            del roles[existing]
+        roles[trigger] = str(role.id)
         self.save_vanity_roles(ctx.guild.id, roles)
+        asyncio.create_task(self.sync_guild(ctx.guild))
 
         remaining = max_roles - len(roles)
         await ctx.send(f"✅ Added: `{trigger}` → {role.mention}\n**{tier}**: {len(roles)}/{max_roles} roles\n剩{remaining} slots left")
@@ -148,10 +202,7 @@ class Vanity(commands.Cog):
     @commands.command()
     @commands.has_permissions(manage_roles=True)
     async def vanity_list(self, ctx):
-        data = self._get_data()
-        gid = str(ctx.guild.id)
-        sub = data["subscriptions"].get(gid, {})
-        tier = sub.get("tier", "FREE")
+        tier = self.bot.premium.get_subscription_tier(ctx.guild.id)
         
         role_limits = {"BASIC": 1, "PRO": 3, "ULTRA": 5, "CUSTOM": 999, "FREE": 0}
         max_roles = role_limits.get(tier.upper(), 0)
@@ -183,9 +234,11 @@ class Vanity(commands.Cog):
             return await ctx.send("❌ Premium only!")
         
         roles = self.get_vanity_roles(ctx.guild.id)
-        if trigger.lower() in roles:
-            del roles[trigger.lower()]
+        existing = self.find_trigger(ctx.guild.id, roles, trigger)
+        if existing is not None:
+            del roles[existing]
             self.save_vanity_roles(ctx.guild.id, roles)
+            asyncio.create_task(self.sync_guild(ctx.guild))
             await ctx.send(f"✅ Removed `{trigger}`")
         else:
             await ctx.send("❌ Trigger not found.")
@@ -197,15 +250,14 @@ class Vanity(commands.Cog):
         if not self.is_premium(ctx.guild.id):
             return await ctx.send("❌ Premium only!")
         
-        status = " ".join([a.name for a in member.activities 
-                          if isinstance(a, discord.CustomActivity)])
+        status = self.custom_status(member)
         roles = self.get_vanity_roles(ctx.guild.id)
         
         matches = []
-        for trigger, role_id in roles.items():
-            if trigger.lower() in status.lower():
-                role = ctx.guild.get_role(int(role_id))
-                matches.append(f"✅ `{trigger}` → {role.mention if role else role_id}")
+        for trigger in self.matching_triggers(ctx.guild.id, roles, status):
+            role_id = roles[trigger]
+            role = ctx.guild.get_role(int(role_id))
+            matches.append(f"✅ `{trigger}` → {role.mention if role else role_id}")
         
         embed = discord.Embed(title="🔍 Vanity Debug", color=discord.Color.blue())
         embed.add_field(name="Status", value=status or "No custom status", inline=False)
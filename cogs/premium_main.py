@@ -7,44 +7,20 @@ from datetime import datetime, timedelta
 class Premium(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.file = "data/premium.json"
 
     def _get_data(self):
-        """Always fresh data - fixes stale cache issue"""
-        if os.path.exists(self.file):
-            with open(self.file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"subscriptions": {}, "vanity": {"roles": {}, "settings": {}}, "grandfathered": []}
+        """Shared cached copy of premium.json (one parse for every cog)"""
+        return self.bot.premium.data()
 
     def _save_data(self, data):
-        """Save with UTF-8 encoding"""
-        os.makedirs(os.path.dirname(self.file), exist_ok=True)
-        with open(self.file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Queue premium.json for writing and re-index entitlements"""
+        self.bot.premium.save(data)
 
     def is_premium(self, guild_id: int) -> bool:
-        data = self._get_data()
-        gid = str(guild_id)
-        if int(gid) in data.get("grandfathered", []): 
-            return True
-        sub = data["subscriptions"].get(gid)
-        if not sub: 
-            return False
-        expires = sub.get("expires_at")
-        if expires and expires != "null":
-            try: 
-                if datetime.fromisoformat(expires) < datetime.now(): 
-                    return False
-            except: 
-                pass
-        return True
+        return self.bot.premium.is_premium(guild_id)
 
     def get_tier(self, guild_id: int) -> str:
-        data = self._get_data()
-        gid = str(guild_id)
-        if int(gid) in data.get("grandfathered", []): 
-            return "GRANDFATHERED"
-        return data["subscriptions"].get(gid, {}).get("tier", "FREE")
+        return self.bot.premium.get_tier(guild_id)
 
     def get_vanity_roles(self, guild_id: int) -> dict:
         data = self._get_data()
@@ -100,7 +76,7 @@ class Premium(commands.Cog):
                 time_left = "Unknown"
 
         # Status
-        is_grandfathered = int(gid) in data.get("grandfathered", [])
+        is_grandfathered = self.bot.premium.is_grandfathered(ctx.guild.id)
         status_emoji = "👑" if is_grandfathered else "⭐"
 
         # Embed
@@ -6,6 +6,7 @@ import os
 import asyncio
 from datetime import datetime, timedelta
 import logging
+from utils.seen_set import SeenSet
 
 logger = logging.getLogger(__name__)
 
@@ -397,10 +398,11 @@ class GuidelinesSettingsView(discord.ui.View):
             'embed_color': self.embed_color,
             'embed_footer': self.embed_footer,
             'enabled': True,
-            'last_sent': None,
-            'sent_users': []
+            'last_sent': None
         }
         
+        # A fresh configuration starts a fresh once-per-user history
+        help_system.reset_seen_users(self.guild_id, self.selected_channel.id)
         help_system.save_guild_settings(self.guild_id, settings)
         
         embed = discord.Embed(
@@ -459,10 +461,73 @@ class GuidelinesSettingsView(discord.ui.View):
         await interaction.followup.send(embed=embed)
 
 
+class GuidelineRule:
+    """A guild's guidelines settings compiled for dispatch.
+    
+    The embed (or plain text) is built once at compile time; ``can_send`` caches the
+    bot's permission check until a channel/role/member update invalidates it; and
+    ``settings`` is the live settings document, updated in place for send-mode state.
+    """
+    
+    __slots__ = ("guild_id", "channel_id", "channel_type", "send_mode", "content", "embed",
+                 "settings", "last_sent", "can_send", "seen")
+    
+    def __init__(self, guild_id, settings):
+        self.guild_id = guild_id
+        self.channel_id = settings.get('channel_id')
+        self.channel_type = settings.get('channel_type')
+        self.send_mode = settings.get('send_mode')
+        self.content = settings['guidelines_message']
+        self.settings = settings
+        self.can_send = None
+        self.seen = None
+        
+        try:
+            self.last_sent = datetime.fromisoformat(settings['last_sent']) if settings.get('last_sent') else None
+        except (TypeError, ValueError):
+            self.last_sent = None
+        
+        self.embed = None
+        if settings.get('message_type') == 'embed':
+            try:
+                color_int = int(settings.get('embed_color', '3498db'), 16)
+            except:
+                color_int = 0x3498db
+            
+            self.embed = discord.Embed(
+                title=settings.get('embed_title', '📋 Guidelines'),
+                description=self.content,
+                color=discord.Color(color_int)
+            )
+            if settings.get('embed_footer'):
+                self.embed.set_footer(text=settings['embed_footer'])
+    
+    @classmethod
+    def compile(cls, guild_id, settings):
+        if not settings.get('enabled') or not settings.get('guidelines_message'):
+            return None
+        if settings.get('channel_type') not in ('text', 'forum') or not settings.get('channel_id'):
+            return None
+        return cls(guild_id, settings)
+    
+    async def send(self, destination):
+        if self.embed is not None:
+            self.embed.timestamp = datetime.now()
+            await destination.send(embed=self.embed)
+        else:
+            await destination.send(self.content)
+
+
 class HelpSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.data_path = self.get_data_path()
+        # channel_id -> GuidelineRule, so unconfigured channels cost one dict miss
+        self.rules = {}
+        self._guild_channels = {}
+    
+    async def cog_load(self):
+        self.build_rules()
     
     def get_data_path(self):
         """Get path for guild settings data"""
@@ -476,16 +541,7 @@ class HelpSystem(commands.Cog):
         os.makedirs(data_dir, exist_ok=True)
         return data_dir
     
-    def load_guild_settings(self, guild_id):
-        """Load guild-specific guidelines settings"""
-        try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_guidelines.json")
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading guild settings for {guild_id}: {e}")
-        
+    def default_guild_settings(self):
         return {
             'enabled': False,
             'channel_type': None,
@@ -496,19 +552,108 @@ class HelpSystem(commands.Cog):
             'embed_title': '📋 Guidelines',
             'embed_color': '3498db',
             'embed_footer': 'Automatic guidelines message',
-            'last_sent': None,
-            'sent_users': []
+            'last_sent': None
         }
     
+    def load_guild_settings(self, guild_id):
+        """Load guild-specific guidelines settings (served from the shared settings cache)"""
+        file_path = os.path.join(self.data_path, f"{guild_id}_guidelines.json")
+        return self.bot.settings_store.get(file_path, self.default_guild_settings)
+    
     def save_guild_settings(self, guild_id, settings):
-        """Save guild-specific guidelines settings"""
-        try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_guidelines.json")
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
-            logger.info(f"Saved guidelines settings for guild {guild_id}")
-        except Exception as e:
-            logger.error(f"Error saving guild settings for {guild_id}: {e}")
+        """Save guild-specific guidelines settings (written behind by the settings cache)"""
+        file_path = os.path.join(self.data_path, f"{guild_id}_guidelines.json")
+        self.bot.settings_store.set(file_path, settings)
+        self.compile_rule(guild_id, settings)
+        logger.info(f"Saved guidelines settings for guild {guild_id}")
+    
+    # -------------------------
+    # Dispatch index
+    # -------------------------
+    def compile_rule(self, guild_id, settings):
+        """(Re)build the dispatch entry for one guild"""
+        old_channel = self._guild_channels.pop(guild_id, None)
+        if old_channel is not None:
+            self.rules.pop(old_channel, None)
+        
+        rule = GuidelineRule.compile(guild_id, settings)
+        if rule:
+            self.rules[rule.channel_id] = rule
+            self._guild_channels[guild_id] = rule.channel_id
+    
+    def build_rules(self):
+        """Compile every saved guild configuration into the dispatch table"""
+        for filename in os.listdir(self.data_path):
+            if not filename.endswith("_guidelines.json"):
+                continue
+            try:
+                guild_id = int(filename[:-len("_guidelines.json")])
+                self.compile_rule(guild_id, self.load_guild_settings(guild_id))
+            except Exception as e:
+                logger.error(f"Error compiling guidelines from {filename}: {e}")
+        logger.info(f"Guidelines active in {len(self.rules)} channel(s)")
+    
+    def _seen_path(self, guild_id, channel_id):
+        return os.path.join(self.data_path, f"{guild_id}_{channel_id}_seen.bin")
+    
+    def seen_users(self, rule):
+        """Once-per-user history for a rule, loaded on first use.
+        
+        Settings may pick ``seen_mode`` 'bloom' (with ``seen_capacity`` / ``seen_error_rate``)
+        to bound memory on very large servers; the default is an exact set.
+        """
+        if rule.seen is None:
+            settings = rule.settings
+            rule.seen = SeenSet(
+                self._seen_path(rule.guild_id, rule.channel_id),
+                mode=settings.get('seen_mode', 'exact'),
+                capacity=settings.get('seen_capacity', 100_000),
+                error_rate=settings.get('seen_error_rate', 0.001)
+            )
+            legacy = settings.pop('sent_users', None)
+            if legacy:
+                rule.seen.update(int(uid) for uid in legacy)
+                self.bot.settings_store.mark_dirty(os.path.join(self.data_path, f"{rule.guild_id}_guidelines.json"))
+                logger.info(f"Migrated {len(legacy)} guideline recipients for guild {rule.guild_id}")
+        return rule.seen
+    
+    def reset_seen_users(self, guild_id, channel_id):
+        rule = self.rules.get(channel_id)
+        if rule and rule.seen is not None:
+            rule.seen.clear()
+            rule.seen = None
+        for path in (self._seen_path(guild_id, channel_id), self._seen_path(guild_id, channel_id) + ".bloom"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    def rule_can_send(self, rule, channel, guild):
+        if rule.can_send is None:
+            rule.can_send = self.check_channel_permissions(channel, guild)
+            if not rule.can_send:
+                logger.warning(f"Bot lacks permissions in channel {rule.channel_id}")
+        return rule.can_send
+    
+    def invalidate_permissions(self, guild_id):
+        rule = self.rules.get(self._guild_channels.get(guild_id))
+        if rule:
+            rule.can_send = None
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.invalidate_permissions(after.guild.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self.invalidate_permissions(after.guild.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.invalidate_permissions(role.guild.id)
+    
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            self.invalidate_permissions(after.guild.id)
     
     def check_channel_permissions(self, channel, guild):
         """Check if bot has necessary permissions in channel"""
@@ -571,46 +716,19 @@ class HelpSystem(commands.Cog):
     @commands.Cog.listener()
     async def on_thread_create(self, thread):
         """Handle new forum thread creation"""
-        if not thread.guild or thread.parent.type != discord.ChannelType.forum:
-            return
-        
-        settings = self.load_guild_settings(thread.guild.id)
-        
-        if not settings.get('enabled') or settings.get('channel_type') != 'forum':
+        if not thread.guild:
             return
         
-        if settings.get('channel_id') != thread.parent.id:
+        rule = self.rules.get(thread.parent_id)
+        if rule is None or rule.channel_type != 'forum':
             return
         
-        if not settings.get('guidelines_message'):
-            return
-        
-        if not self.check_channel_permissions(thread, thread.guild):
-            logger.warning(f"Bot lacks permissions to send in forum thread {thread.id}")
+        if not self.rule_can_send(rule, thread, thread.guild):
             return
         
         try:
             await asyncio.sleep(1)
-            
-            if settings.get('message_type') == 'embed':
-                try:
-                    color_int = int(settings.get('embed_color', '3498db'), 16)
-                except:
-                    color_int = 0x3498db
-                
-                embed = discord.Embed(
-                    title=settings.get('embed_title', '📋 Guidelines'),
-                    description=settings['guidelines_message'],
-                    color=discord.Color(color_int),
-                    timestamp=datetime.now()
-                )
-                if settings.get('embed_footer'):
-                    embed.set_footer(text=settings['embed_footer'])
-                
-                await thread.send(embed=embed)
-            else:
-                await thread.send(settings['guidelines_message'])
-            
+            await rule.send(thread)
             logger.info(f"Sent guidelines to forum thread {thread.id}")
             
         except discord.Forbidden as e:
@@ -621,25 +739,18 @@ class HelpSystem(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, message):
         """Handle messages in text channels based on send mode"""
-        if message.author.bot or not message.guild:
+        rule = self.rules.get(message.channel.id)
+        if rule is None or rule.channel_type != 'text':
             return
         
-        settings = self.load_guild_settings(message.guild.id)
-        
-        if not settings.get('enabled') or settings.get('channel_type') != 'text':
-            return
-        
-        if settings.get('channel_id') != message.channel.id:
-            return
-        
-        if not settings.get('guidelines_message'):
+        if message.author.bot or not message.guild:
             return
         
-        if not self.check_channel_permissions(message.channel, message.guild):
-            logger.warning(f"Bot lacks permissions in channel {message.channel.id}")
+        if not self.rule_can_send(rule, message.channel, message.guild):
             return
         
-        send_mode = settings.get('send_mode')
+        send_mode = rule.send_mode
+        settings = rule.settings
         should_send = False
         
         try:
@@ -647,43 +758,23 @@ class HelpSystem(commands.Cog):
                 should_send = True
             
             elif send_mode == 'once_daily':
-                last_sent = settings.get('last_sent')
-                if not last_sent or datetime.fromisoformat(last_sent) < datetime.now() - timedelta(days=1):
+                if not rule.last_sent or rule.last_sent < datetime.now() - timedelta(days=1):
                     should_send = True
             
             elif send_mode == 'once_per_user':
-                sent_users = settings.get('sent_users', [])
-                if str(message.author.id) not in sent_users:
-                    should_send = True
-                    sent_users.append(str(message.author.id))
-                    settings['sent_users'] = sent_users
+                should_send = self.seen_users(rule).add(message.author.id)
             
             if should_send:
-                if settings.get('message_type') == 'embed':
-                    try:
-                        color_int = int(settings.get('embed_color', '3498db'), 16)
-                    except:
-                        color_int = 0x3498db
-                    
-                    embed = discord.Embed(
-                        title=settings.get('embed_title', '📋 Guidelines'),
-                        description=settings['guidelines_message'],
-                        color=discord.Color(color_int),
-                        timestamp=datetime.now()
-                    )
-                    if settings.get('embed_footer'):
-                        embed.set_footer(text=settings['embed_footer'])
-                    
-                    await message.channel.send(embed=embed)
-                else:
-                    await message.channel.send(settings['guidelines_message'])
+                await rule.send(message.channel)
                 
-                settings['last_sent'] = datetime.now().isoformat()
-                self.save_guild_settings(message.guild.id, settings)
+                rule.last_sent = datetime.now()
+                settings['last_sent'] = rule.last_sent.isoformat()
+                self.bot.settings_store.mark_dirty(os.path.join(self.data_path, f"{rule.guild_id}_guidelines.json"))
                 
                 logger.info(f"Sent guidelines in channel {message.channel.id}")
                 
         except discord.Forbidden as e:
+            rule.can_send = None
             logger.error(f"Permission denied in channel {message.channel.id}: {e}")
         except Exception as e:
             logger.error(f"Error sending guidelines in channel {message.channel.id}: {e}")
@@ -1,11 +1,14 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone, time as dt_time
 import json
 import os
 import asyncio
+import heapq
 import logging
+import time
+from utils.append_log import AppendLog
 
 logger = logging.getLogger(__name__)
 
@@ -228,7 +231,7 @@ class ConfirmCloseView(discord.ui.View):
         
         cog = self.bot.get_cog('ThreadManager')
         if cog:
-            cog.update_thread_activity(self.thread.id)
+            cog.update_thread_activity(self.thread)
 
 
 class ThankHelpersView(discord.ui.View):
@@ -411,19 +414,90 @@ class InactivityView(discord.ui.View):
         
         cog = self.bot.get_cog('ThreadManager')
         if cog:
-            cog.update_thread_activity(self.thread.id)
+            cog.update_thread_activity(self.thread)
+
+
+class HelperLeaderboard:
+    """Weekly thanks ranking maintained incrementally.
+    
+    Helpers sit in buckets keyed by their weekly count; a thank moves one helper up a
+    bucket in O(1) and the top K are read from the highest buckets down, so nothing is
+    re-sorted per command. Ties keep the order in which helpers reached the count.
+    """
+    
+    def __init__(self, counts=None):
+        self.counts = {}
+        self.buckets = {}
+        self.max_count = 0
+        for helper_id, count in sorted((counts or {}).items(), key=lambda x: x[1]):
+            if count > 0:
+                self.counts[helper_id] = count
+                self.buckets.setdefault(count, {})[helper_id] = None
+                self.max_count = max(self.max_count, count)
+    
+    def increment(self, helper_id):
+        count = self.counts.get(helper_id, 0)
+        if count:
+            bucket = self.buckets[count]
+            del bucket[helper_id]
+            if not bucket:
+                del self.buckets[count]
+        count += 1
+        self.counts[helper_id] = count
+        self.buckets.setdefault(count, {})[helper_id] = None
+        self.max_count = max(self.max_count, count)
+    
+    def top(self, k):
+        result = []
+        count = self.max_count
+        while count > 0 and len(result) < k:
+            for helper_id in self.buckets.get(count, ()):
+                result.append((helper_id, count))
+                if len(result) == k:
+                    break
+            count -= 1
+        return result
 
 
 class ThreadManager(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.data_path = self.get_data_path()
-        self.thread_activity = {}
         self.inactivity_hours = 48
-        self.check_inactive_threads.start()
+        self.history_fetch_concurrency = 5
+        self._history_semaphore = asyncio.Semaphore(self.history_fetch_concurrency)
+        # Helper backfill reads at most this many older messages, once per thread
+        self.helper_backfill_limit = 1000
+        self._backfills = {}
+        # Helper index: per-guild journal of deltas, appended every few seconds and
+        # compacted (rewritten as one record per open thread) once it has grown
+        self._helper_indexes = {}
+        self._helper_journals = {}
+        self._helper_buffers = {}
+        self.helper_journal_min_compact = 500
+        # Inactivity timers: min-heap of (due, thread_id, guild_id) with one live entry per
+        # thread (_queued). Messages only move last activity forward, so an entry can only
+        # fire early; it is re-checked and re-queued instead of being pushed on every message.
+        self._timer_heap = []
+        self._queued = {}
+        self._timer_wakeup = asyncio.Event()
+        self._timer_task = None
+        self._closure_logs = {}
+        self._leaderboards = {}
+    
+    async def cog_load(self):
+        self._timer_task = asyncio.create_task(self.run_inactivity_timers())
+        self.weekly_rollover.start()
+        self.persist_helper_journals.start()
     
     def cog_unload(self):
-        self.check_inactive_threads.cancel()
+        if self._timer_task:
+            self._timer_task.cancel()
+        for task in list(self._backfills.values()):
+            task.cancel()
+        self.weekly_rollover.cancel()
+        self.persist_helper_journals.cancel()
+        self.flush_helper_journals()
     
     def get_data_path(self):
         """Get path for help system data"""
@@ -437,31 +511,29 @@ class ThreadManager(commands.Cog):
         os.makedirs(data_dir, exist_ok=True)
         return data_dir
     
+    def _path(self, guild_id, name):
+        return os.path.join(self.data_path, f"{guild_id}_{name}.json")
+    
     def load_guild_config(self, guild_id):
         """Load guild configuration for thread management"""
-        try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_thread_config.json")
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading thread config for guild {guild_id}: {e}")
-        
-        return {
-            'enabled': False,
-            'forum_channels': [],
-            'inactivity_hours': 48
-        }
+        return self.bot.settings_store.get(
+            self._path(guild_id, "thread_config"),
+            lambda: {
+                'enabled': False,
+                'forum_channels': [],
+                'inactivity_hours': 48
+            }
+        )
     
     def save_guild_config(self, guild_id, config):
         """Save guild configuration"""
-        try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_thread_config.json")
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            logger.info(f"Saved thread config for guild {guild_id}")
-        except Exception as e:
-            logger.error(f"Error saving thread config for guild {guild_id}: {e}")
+        self.bot.settings_store.set(self._path(guild_id, "thread_config"), config)
+        logger.info(f"Saved thread config for guild {guild_id}")
+        
+        # Channels or hours may have changed; rebuild this guild's timers
+        guild = self.bot.get_guild(guild_id)
+        if guild and self.bot.is_ready():
+            asyncio.create_task(self.seed_guild_timers(guild))
     
     def is_monitored_channel(self, guild_id, channel_id):
         """Check if a forum channel is being monitored"""
@@ -470,27 +542,76 @@ class ThreadManager(commands.Cog):
     
     def load_helper_stats(self, guild_id):
         """Load helper statistics"""
-        try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_helper_stats.json")
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading helper stats for guild {guild_id}: {e}")
-        
-        return {}
+        return self.bot.settings_store.get(self._path(guild_id, "helper_stats"), dict)
     
     def save_helper_stats(self, guild_id, stats):
         """Save helper statistics"""
-        try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_helper_stats.json")
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(stats, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Error saving helper stats for guild {guild_id}: {e}")
+        self.bot.settings_store.set(self._path(guild_id, "helper_stats"), stats)
+    
+    @staticmethod
+    def current_week():
+        year, week, _ = datetime.now(timezone.utc).isocalendar()
+        return f"{year}-W{week:02d}"
+    
+    def leaderboard(self, guild_id):
+        """Cached weekly leaderboard, built from helper stats on first use"""
+        self.maybe_rollover(guild_id)
+        board = self._leaderboards.get(guild_id)
+        if board is None:
+            stats = self.load_helper_stats(guild_id)
+            board = HelperLeaderboard({k: v.get('weekly_thanks', 0) for k, v in stats.items()})
+            self._leaderboards[guild_id] = board
+        return board
+    
+    def _thanks_weeks(self):
+        """guild_id -> ISO week its helper stats were last rolled over in"""
+        return self.bot.settings_store.get(os.path.join(self.data_path, "thanks_weeks.json"), dict)
+    
+    def maybe_rollover(self, guild_id):
+        """Reset weekly_thanks in bulk once the ISO week (UTC) has changed"""
+        # Guilds without helper stats have nothing to reset; don't create files for them
+        if not self.bot.settings_store.contains(self._path(guild_id, "helper_stats")):
+            return
+        weeks = self._thanks_weeks()
+        week = self.current_week()
+        last_week = weeks.get(str(guild_id))
+        if last_week == week:
+            return
+        
+        stats = self.load_helper_stats(guild_id)
+        if stats:
+            # First rollover for a guild: only clear counts from thanks before this week
+            today = datetime.now().date()
+            week_start = datetime.combine(today - timedelta(days=today.weekday()), dt_time()).isoformat()
+            full_reset = last_week is not None
+            now = datetime.now().isoformat()
+            for helper_stats in stats.values():
+                if full_reset or helper_stats.get('last_thank', '') < week_start:
+                    helper_stats['weekly_thanks'] = 0
+                    helper_stats['last_reset'] = now
+            self.bot.settings_store.mark_dirty(self._path(guild_id, "helper_stats"))
+            logger.info(f"Weekly helper thanks reset for guild {guild_id}")
+        
+        weeks[str(guild_id)] = week
+        self.bot.settings_store.mark_dirty(os.path.join(self.data_path, "thanks_weeks.json"))
+        self._leaderboards.pop(guild_id, None)
+    
+    @tasks.loop(time=dt_time(hour=0, minute=0, tzinfo=timezone.utc))
+    async def weekly_rollover(self):
+        """Daily at 00:00 UTC; rolls guilds over on the first run of a new week"""
+        for guild in self.bot.guilds:
+            try:
+                self.maybe_rollover(guild.id)
+            except Exception as e:
+                logger.error(f"Error rolling over helper stats for guild {guild.id}: {e}")
+    
+    @weekly_rollover.before_loop
+    async def before_weekly_rollover(self):
+        await self.bot.wait_until_ready()
     
     def add_helper_thanks(self, guild_id, helper_id):
         """Add a thank to a helper's stats"""
+        board = self.leaderboard(guild_id)
         stats = self.load_helper_stats(guild_id)
         helper_key = str(helper_id)
         
@@ -504,129 +625,406 @@ class ThreadManager(commands.Cog):
         stats[helper_key]['total_thanks'] += 1
         stats[helper_key]['weekly_thanks'] += 1
         stats[helper_key]['last_thank'] = datetime.now().isoformat()
+        board.increment(helper_key)
         
-        self.save_helper_stats(guild_id, stats)
+        self.bot.settings_store.mark_dirty(self._path(guild_id, "helper_stats"))
         logger.info(f"Added thank for helper {helper_id} in guild {guild_id}")
     
+    def closure_log(self, guild_id):
+        log = self._closure_logs.get(guild_id)
+        if log is None:
+            log = AppendLog(os.path.join(self.data_path, f"{guild_id}_closures.jsonl"))
+            self._migrate_closures(guild_id, log)
+            self._closure_logs[guild_id] = log
+        return log
+    
+    def _migrate_closures(self, guild_id, log):
+        """One-time move of the old {gid}_closures.json array into the JSONL log"""
+        legacy_path = self._path(guild_id, "closures")
+        if not self.bot.settings_store.contains(legacy_path):
+            return
+        try:
+            self.bot.settings_store.invalidate(legacy_path)
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            log.rewrite(legacy[-log.keep:] + log.read())
+            os.remove(legacy_path)
+            logger.info(f"Migrated {len(legacy)} closure records for guild {guild_id}")
+        except Exception as e:
+            logger.error(f"Error migrating closures for guild {guild_id}: {e}")
+    
     def log_thread_closure(self, guild_id, thread_id, creator_id, closer_id, thanked_helpers):
         """Log thread closure for analytics"""
         try:
-            file_path = os.path.join(self.data_path, f"{guild_id}_closures.json")
-            
-            closures = []
-            if os.path.exists(file_path):
-                with open(file_path, "r", encoding="utf-8") as f:
-                    closures = json.load(f)
-            
-            closures.append({
+            self.closure_log(guild_id).append({
                 'thread_id': thread_id,
                 'creator_id': creator_id,
                 'closed_by': closer_id,
                 'thanked_helpers': thanked_helpers,
                 'closed_at': datetime.now().isoformat()
             })
-            
-            closures = closures[-1000:]
-            
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(closures, f, indent=2, ensure_ascii=False)
         except Exception as e:
             logger.error(f"Error logging thread closure: {e}")
     
-    def update_thread_activity(self, thread_id):
-        """Update thread activity timestamp"""
-        self.thread_activity[thread_id] = datetime.now()
+    def update_thread_activity(self, thread):
+        """Treat the thread as active right now (e.g. creator chose to keep it open)"""
+        if self.is_monitored_channel(thread.guild.id, thread.parent_id):
+            self.touch_thread(thread, time.time())
     
-    async def get_thread_helpers(self, thread):
-        """Get list of unique helpers in a thread"""
-        helpers = []
-        creator = thread.owner
-        
+    # -------------------------
+    # Helper index
+    # -------------------------
+    def _helper_index(self, guild_id):
+        """thread_id -> {'since', 'full', 'helpers': {helper_id: message_count}} for open threads.
+        
+        'helpers' is kept in recency order (last speaker last). 'since' is the first message
+        indexed live; anything older is backfilled from history once, on first use. Archived
+        threads are evicted and backfilled again if they reopen. Loaded by replaying the
+        guild's journal.
+        """
+        index = self._helper_indexes.get(guild_id)
+        if index is None:
+            index = self._helper_indexes[guild_id] = {}
+            journal = self._helper_journal(guild_id)
+            for record in journal.read():
+                self._apply_helper_record(index, record)
+            self._migrate_helper_index(guild_id, index)
+        return index
+    
+    def _helper_journal(self, guild_id):
+        journal = self._helper_journals.get(guild_id)
+        if journal is None:
+            path = os.path.join(self.data_path, f"{guild_id}_thread_helpers.jsonl")
+            journal = self._helper_journals[guild_id] = AppendLog(path, compact_at=None)
+        return journal
+    
+    def _migrate_helper_index(self, guild_id, index):
+        """One-time move of the old {gid}_thread_helpers.json document into the journal"""
+        legacy_path = self._path(guild_id, "thread_helpers")
+        if not self.bot.settings_store.contains(legacy_path):
+            return
         try:
-            async for message in thread.history(limit=100):
-                if message.author.bot or message.author == creator:
-                    continue
-                
-                if message.author not in helpers:
-                    helpers.append(message.author)
+            self.bot.settings_store.invalidate(legacy_path)
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            for thread_id, entry in legacy.items():
+                index.setdefault(thread_id, entry)
+            self._helper_journal(guild_id).rewrite(self._helper_snapshot(index))
+            os.remove(legacy_path)
+            logger.info(f"Migrated helper index of {len(legacy)} threads for guild {guild_id}")
         except Exception as e:
-            logger.error(f"Error fetching thread helpers for thread {thread.id}: {e}")
+            logger.error(f"Error migrating helper index for guild {guild_id}: {e}")
+    
+    @staticmethod
+    def _apply_helper_record(index, record):
+        thread_id = record['t']
+        op = record['op']
+        if op == 'set':
+            index[thread_id] = {'since': record['since'], 'full': record['full'], 'helpers': record['helpers']}
+        elif op == 'del':
+            index.pop(thread_id, None)
+        elif op == 'msg' and thread_id in index:
+            helpers = index[thread_id]['helpers']
+            helpers[record['h']] = helpers.pop(record['h'], 0) + 1
+    
+    @staticmethod
+    def _helper_snapshot(index):
+        return [{'op': 'set', 't': thread_id, **entry} for thread_id, entry in index.items()]
+    
+    def _record_helper_change(self, guild_id, op, thread_id, **fields):
+        """Queue one helper index delta for the guild's journal"""
+        self._helper_buffers.setdefault(guild_id, []).append({'op': op, 't': thread_id, **fields})
+    
+    def _record_helper_entry(self, guild_id, thread_id, entry):
+        self._record_helper_change(guild_id, 'set', thread_id, since=entry['since'], full=entry['full'],
+                                   helpers=dict(entry['helpers']))
+    
+    def flush_helper_journals(self):
+        """Append buffered deltas; rewrite a journal that has grown well past its live entries"""
+        for guild_id in list(self._helper_buffers):
+            records = self._helper_buffers.pop(guild_id)
+            journal = self._helper_journal(guild_id)
+            index = self._helper_index(guild_id)
+            try:
+                if len(journal) + len(records) > max(self.helper_journal_min_compact, 4 * len(index)):
+                    journal.rewrite(self._helper_snapshot(index))
+                else:
+                    journal.extend(records)
+            except Exception as e:
+                logger.error(f"Error writing helper journal for guild {guild_id}: {e}")
+    
+    @tasks.loop(seconds=5)
+    async def persist_helper_journals(self):
+        self.flush_helper_journals()
+    
+    def record_helper_message(self, message):
+        thread = message.channel
+        guild_id = message.guild.id
+        index = self._helper_index(guild_id)
+        thread_key = str(thread.id)
+        entry = index.get(thread_key)
+        if entry is None:
+            # A forum thread's starter message shares the thread's id: nothing older to backfill
+            entry = index[thread_key] = {'since': message.id, 'full': message.id == thread.id, 'helpers': {}}
+            self._record_helper_entry(guild_id, thread_key, entry)
+        
+        if message.author.bot or message.author.id == thread.owner_id:
+            return
+        helpers = entry['helpers']
+        key = str(message.author.id)
+        helpers[key] = helpers.pop(key, 0) + 1
+        self._record_helper_change(guild_id, 'msg', thread_key, h=key)
+    
+    async def _backfill_helpers(self, thread, entry):
+        if not entry.get('since'):
+            # Pin the cut-off first so messages indexed live during the scan aren't counted twice
+            entry['since'] = (thread.last_message_id or discord.utils.time_snowflake(discord.utils.utcnow())) + 1
+        before = discord.Object(id=entry['since'])
+        older = {}
+        try:
+            async with self._history_semaphore:
+                async for message in thread.history(limit=self.helper_backfill_limit, before=before):
+                    if message.author.bot or message.author.id == thread.owner_id:
+                        continue
+                    key = str(message.author.id)
+                    older[key] = older.get(key, 0) + 1
+        except Exception as e:
+            logger.error(f"Error backfilling helpers for thread {thread.id}: {e}")
+            return
+        
+        # history() is newest first; live entries are more recent than anything backfilled
+        live = entry['helpers']
+        merged = {k: older[k] for k in reversed(list(older)) if k not in live}
+        for k, count in live.items():
+            merged[k] = count + older.get(k, 0)
+        entry['helpers'] = merged
+        entry['full'] = True
+        # The thread may have been archived (and evicted) while history was being read
+        if self._helper_index(thread.guild.id).get(str(thread.id)) is entry:
+            self._record_helper_entry(thread.guild.id, str(thread.id), entry)
+    
+    async def get_thread_helpers(self, thread):
+        """Helpers in a thread (most recent first), served from the helper index"""
+        index = self._helper_index(thread.guild.id)
+        entry = index.setdefault(str(thread.id), {'since': None, 'full': False, 'helpers': {}})
+        if not entry['full']:
+            # Concurrent callers share one backfill so older messages are only counted once
+            task = self._backfills.get(thread.id)
+            if task is None:
+                task = self._backfills[thread.id] = asyncio.create_task(self._backfill_helpers(thread, entry))
+                task.add_done_callback(lambda _: self._backfills.pop(thread.id, None))
+            await asyncio.shield(task)
         
+        helpers = []
+        for helper_id in reversed(list(entry['helpers'])):
+            member = thread.guild.get_member(int(helper_id))
+            if member:
+                helpers.append(member)
         return helpers
     
-    @tasks.loop(minutes=30)
-    async def check_inactive_threads(self):
-        """Check for inactive threads and prompt closure"""
-        try:
-            for guild in self.bot.guilds:
-                config = self.load_guild_config(guild.id)
-                
-                if not config.get('enabled', False):
-                    continue
-                
-                monitored_channels = config.get('forum_channels', [])
-                if not monitored_channels:
+    def forget_thread(self, guild_id, thread_id):
+        """Drop the timer and helper index entry of an archived or deleted thread"""
+        self.drop_timer(guild_id, thread_id)
+        if self._helper_index(guild_id).pop(str(thread_id), None) is not None:
+            self._record_helper_change(guild_id, 'del', str(thread_id))
+    
+    # -------------------------
+    # Inactivity timers
+    # -------------------------
+    def _timers(self, guild_id):
+        """thread_id -> [last_activity, snoozed_until] in epoch seconds, persisted per guild"""
+        return self.bot.settings_store.get(self._path(guild_id, "thread_timers"), dict)
+    
+    def _inactivity_seconds(self, guild_id):
+        return self.load_guild_config(guild_id).get('inactivity_hours', self.inactivity_hours) * 3600
+    
+    def _push_timer(self, guild_id, thread_id, due):
+        self._queued[thread_id] = due
+        heapq.heappush(self._timer_heap, (due, thread_id, guild_id))
+        if self._timer_heap[0][1] == thread_id:
+            self._timer_wakeup.set()
+    
+    @staticmethod
+    def _note_activity(timers, thread_id, ts):
+        entry = timers.setdefault(str(thread_id), [ts, 0])
+        if ts > entry[0]:
+            entry[0] = ts
+        return entry
+    
+    def touch_thread(self, thread, ts):
+        """Record activity in a monitored thread; queues a timer for threads not yet tracked"""
+        guild_id = thread.guild.id
+        timers = self._timers(guild_id)
+        entry = self._note_activity(timers, thread.id, ts)
+        self.bot.settings_store.mark_dirty(self._path(guild_id, "thread_timers"))
+        if thread.id not in self._queued:
+            self._push_timer(guild_id, thread.id, max(entry[0] + self._inactivity_seconds(guild_id), entry[1]))
+    
+    def drop_timer(self, guild_id, thread_id):
+        self._queued.pop(thread_id, None)
+        if self._timers(guild_id).pop(str(thread_id), None) is not None:
+            self.bot.settings_store.mark_dirty(self._path(guild_id, "thread_timers"))
+    
+    @staticmethod
+    def last_activity_from_snowflake(thread):
+        """Last message time decoded from thread.last_message_id (no API call)"""
+        if thread.last_message_id:
+            return discord.utils.snowflake_time(thread.last_message_id)
+        return None
+    
+    async def fetch_last_activity(self, thread):
+        """REST fallback for threads without a cached last_message_id (falls back to creation time)"""
+        async with self._history_semaphore:
+            try:
+                async for msg in thread.history(limit=1):
+                    return msg.created_at
+            except Exception as e:
+                logger.debug(f"Could not fetch history for thread {thread.id}: {e}")
+        return thread.created_at
+    
+    async def seed_guild_timers(self, guild):
+        """Rebuild a guild's timers from its open monitored threads (startup / config change)"""
+        config = self.load_guild_config(guild.id)
+        timers = self._timers(guild.id)
+        live = set()
+        
+        if config.get('enabled', False):
+            missing = []
+            for channel_id in config.get('forum_channels', []):
+                channel = guild.get_channel(channel_id)
+                if not channel or channel.type != discord.ChannelType.forum:
                     continue
-                
-                inactivity_hours = config.get('inactivity_hours', self.inactivity_hours)
-                
-                for channel in guild.channels:
-                    if channel.type == discord.ChannelType.forum and channel.id in monitored_channels:
-                        try:
-                            active_threads = channel.threads
-                            
-                            for thread in active_threads:
-                                if thread.archived:
-                                    continue
-                                
-                                last_message = None
-                                try:
-                                    async for msg in thread.history(limit=1):
-                                        last_message = msg
-                                        break
-                                except:
-                                    continue
-                                
-                                if not last_message:
-                                    continue
-                                
-                                time_since_last = datetime.now(last_message.created_at.tzinfo) - last_message.created_at
-                                hours_inactive = time_since_last.total_seconds() / 3600
-                                
-                                if hours_inactive >= inactivity_hours:
-                                    if thread.id in self.thread_activity:
-                                        last_check = self.thread_activity[thread.id]
-                                        if (datetime.now() - last_check).total_seconds() < 86400:
-                                            continue
-                                    
-                                    creator = thread.owner
-                                    if not creator:
-                                        continue
-                                    
-                                    helpers = await self.get_thread_helpers(thread)
-                                    
-                                    embed = discord.Embed(
-                                        title="⏰ Thread Inactivity Notice",
-                                        description=f"{creator.mention}, this thread has been inactive for {int(hours_inactive)} hours.\n\nWould you like to close it, or do you still need help?",
-                                        color=discord.Color.orange(),
-                                        timestamp=datetime.now()
-                                    )
-                                    
-                                    view = InactivityView(self.bot, thread, creator.id, helpers)
-                                    
-                                    await thread.send(embed=embed, view=view)
-                                    self.thread_activity[thread.id] = datetime.now()
-                                    
-                                    logger.info(f"Sent inactivity notice for thread {thread.id} in guild {guild.id}")
-                                    
-                        except Exception as e:
-                            logger.error(f"Error checking forum channel {channel.id}: {e}")
-        except Exception as e:
-            logger.error(f"Error in inactive thread checker: {e}")
+                for thread in channel.threads:
+                    if thread.archived:
+                        continue
+                    live.add(thread.id)
+                    last_activity = self.last_activity_from_snowflake(thread)
+                    if last_activity is None:
+                        missing.append(thread)
+                    else:
+                        self._note_activity(timers, thread.id, last_activity.timestamp())
+            
+            # Only threads without a last_message_id need a REST call
+            if missing:
+                fetched = await asyncio.gather(*(self.fetch_last_activity(t) for t in missing))
+                for thread, last_activity in zip(missing, fetched):
+                    self._note_activity(timers, thread.id, last_activity.timestamp())
+        
+        for key in [k for k in timers if int(k) not in live]:
+            del timers[key]
+            self._queued.pop(int(key), None)
+        
+        # Threads archived or deleted while the bot was offline
+        index = self._helper_index(guild.id)
+        for key in [k for k in index if int(k) not in live]:
+            del index[key]
+            self._record_helper_change(guild.id, 'del', key)
+        
+        window = self._inactivity_seconds(guild.id)
+        for key, (last, snoozed_until) in timers.items():
+            self._push_timer(guild.id, int(key), max(last + window, snoozed_until))
+        
+        self.bot.settings_store.mark_dirty(self._path(guild.id, "thread_timers"))
     
-    @check_inactive_threads.before_loop
-    async def before_check_inactive(self):
+    async def run_inactivity_timers(self):
+        """Single sleeper that wakes only when the earliest thread deadline is due"""
         await self.bot.wait_until_ready()
+        for guild in self.bot.guilds:
+            try:
+                await self.seed_guild_timers(guild)
+            except Exception as e:
+                logger.error(f"Error seeding inactivity timers for guild {guild.id}: {e}")
+        
+        heap = self._timer_heap
+        while True:
+            self._timer_wakeup.clear()
+            timeout = heap[0][0] - time.time() if heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._timer_wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            due, thread_id, guild_id = heapq.heappop(heap)
+            if self._queued.get(thread_id) != due:
+                continue  # superseded by a reseed
+            del self._queued[thread_id]
+            
+            try:
+                await self.fire_timer(guild_id, thread_id)
+            except Exception as e:
+                logger.error(f"Error in inactivity timer for thread {thread_id}: {e}")
+    
+    async def fire_timer(self, guild_id, thread_id):
+        entry = self._timers(guild_id).get(str(thread_id))
+        if entry is None:
+            return
+        
+        guild = self.bot.get_guild(guild_id)
+        thread = guild.get_thread(thread_id) if guild else None
+        if thread is None or thread.archived or not self.is_monitored_channel(guild_id, thread.parent_id):
+            self.drop_timer(guild_id, thread_id)
+            return
+        
+        last_activity = self.last_activity_from_snowflake(thread)
+        if last_activity:
+            self._note_activity(self._timers(guild_id), thread_id, last_activity.timestamp())
+        
+        now = time.time()
+        window = self._inactivity_seconds(guild_id)
+        due = max(entry[0] + window, entry[1])
+        if due > now:
+            self._push_timer(guild_id, thread_id, due)
+            return
+        
+        # Snooze and persist before sending so a restart cannot repeat the notice
+        entry[1] = now + max(window, 86400)
+        self.bot.settings_store.mark_dirty(self._path(guild_id, "thread_timers"))
+        self._push_timer(guild_id, thread_id, entry[1])
+        
+        await self.send_inactivity_notice(thread, (now - entry[0]) / 3600)
+    
+    async def send_inactivity_notice(self, thread, hours_inactive):
+        creator = thread.owner
+        if not creator:
+            return
+        
+        helpers = await self.get_thread_helpers(thread)
+        
+        embed = discord.Embed(
+            title="⏰ Thread Inactivity Notice",
+            description=f"{creator.mention}, this thread has been inactive for {int(hours_inactive)} hours.\n\nWould you like to close it, or do you still need help?",
+            color=discord.Color.orange(),
+            timestamp=datetime.now()
+        )
+        
+        view = InactivityView(self.bot, thread, creator.id, helpers)
+        
+        await thread.send(embed=embed, view=view)
+        
+        logger.info(f"Sent inactivity notice for thread {thread.id} in guild {thread.guild.id}")
+    
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        channel = message.channel
+        if not message.guild or not isinstance(channel, discord.Thread):
+            return
+        if not self.is_monitored_channel(message.guild.id, channel.parent_id):
+            return
+        self.touch_thread(channel, message.created_at.timestamp())
+        self.record_helper_message(message)
+    
+    @commands.Cog.listener()
+    async def on_thread_update(self, before, after):
+        if after.archived and not before.archived:
+            self.forget_thread(after.guild.id, after.id)
+        elif before.archived and not after.archived:
+            self.update_thread_activity(after)
+    
+    @commands.Cog.listener()
+    async def on_thread_delete(self, thread):
+        self.forget_thread(thread.guild.id, thread.id)
     
     @commands.hybrid_command(name="setup_thread_manager", description="Configure thread management settings")
     @app_commands.default_permissions(manage_guild=True)
@@ -729,6 +1127,7 @@ class ThreadManager(commands.Cog):
     async def helper_stats(self, ctx: commands.Context, user: discord.Member = None):
         """View helper statistics"""
         
+        self.maybe_rollover(ctx.guild.id)
         stats = self.load_helper_stats(ctx.guild.id)
         
         if user:
@@ -759,11 +1158,7 @@ class ThreadManager(commands.Cog):
             
             await ctx.send(embed=embed)
         else:
-            sorted_helpers = sorted(
-                stats.items(),
-                key=lambda x: x[1].get('weekly_thanks', 0),
-                reverse=True
-            )[:10]
+            sorted_helpers = [(helper_id, stats.get(helper_id, {})) for helper_id, _ in self.leaderboard(ctx.guild.id).top(10)]
             
             embed = discord.Embed(
                 title="🏆 Helper Leaderboard - This Week",
@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import datetime
 from typing import Optional
@@ -7,6 +7,11 @@ import logging
 import json
 import os
 import asyncio
+import tempfile
+import time
+from collections import deque
+from utils.append_log import AppendLog
+from utils.deletion_queue import DeletionQueue
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -32,57 +37,149 @@ class AFKView(discord.ui.View):
 class AFK(commands.Cog):
     """AFK system with persistent storage and notifications"""
     
+    MENTION_HISTORY = 25  # mentions kept per user; the total is counted separately
+    
     def __init__(self, bot):
         self.bot = bot
         self.afk_users = {}
         self.afk_file = "data/afk_data.json"
         self.processing_removal = set()
+        # Write-behind journal: mutations are buffered, appended every few seconds and
+        # folded into afk_data.json by a periodic snapshot (and at unload)
+        self.journal = AppendLog("data/afk_journal.jsonl", compact_at=None)
+        self._journal_buffer = []
+        self.snapshot_interval = 300
+        self._last_snapshot = time.monotonic()
+        # (channel_id, afk_user_id) -> monotonic time until which repeat notices are suppressed
+        self.notice_cooldown = 60
+        self.notice_cooldowns = {}
+        self.deletions = DeletionQueue()
         
         os.makedirs("data", exist_ok=True)
         self.load_afk_data()
         
         logger.info("%s loaded with %d AFK users", self.__class__.__name__, len(self.afk_users))
 
+    async def cog_load(self):
+        self.persist_task.start()
+
+    def _deserialize(self, afk_data):
+        mentions = afk_data.get("mentions", [])
+        return {
+            "reason": afk_data["reason"],
+            "time": datetime.datetime.fromisoformat(afk_data["time"]),
+            "name": afk_data["name"],
+            "guild_id": afk_data.get("guild_id"),
+            "mentions": deque(mentions, maxlen=self.MENTION_HISTORY),
+            "mention_count": afk_data.get("mention_count", len(mentions)),
+            "global": afk_data.get("global", False),
+            "dm_notifications": afk_data.get("dm_notifications", True)
+        }
+
+    @staticmethod
+    def _serialize(afk_data):
+        return {
+            "reason": afk_data["reason"],
+            "time": afk_data["time"].isoformat(),
+            "name": afk_data["name"],
+            "guild_id": afk_data.get("guild_id"),
+            "mentions": list(afk_data.get("mentions", [])),
+            "mention_count": afk_data.get("mention_count", 0),
+            "global": afk_data.get("global", False),
+            "dm_notifications": afk_data.get("dm_notifications", True)
+        }
+
     def load_afk_data(self):
-        """Load AFK data from JSON file"""
+        """Load the AFK snapshot, then replay the journal on top of it"""
         try:
             if os.path.exists(self.afk_file):
                 with open(self.afk_file, 'r') as f:
                     data = json.load(f)
                     for user_id, afk_data in data.items():
-                        self.afk_users[int(user_id)] = {
-                            "reason": afk_data["reason"],
-                            "time": datetime.datetime.fromisoformat(afk_data["time"]),
-                            "name": afk_data["name"],
-                            "guild_id": afk_data.get("guild_id"),
-                            "mentions": afk_data.get("mentions", []),
-                            "global": afk_data.get("global", False),
-                            "dm_notifications": afk_data.get("dm_notifications", True)
-                        }
-                logger.info("Loaded %d AFK users from file", len(self.afk_users))
+                        self.afk_users[int(user_id)] = self._deserialize(afk_data)
+            replayed = self.journal.read()
+            for entry in replayed:
+                self._apply(entry)
+            logger.info("Loaded %d AFK users from file (%d journal entries)", len(self.afk_users), len(replayed))
         except Exception as e:
             logger.error("Error loading AFK data: %s", str(e))
 
+    def _apply(self, entry):
+        user_id = entry["id"]
+        op = entry["op"]
+        if op == "set":
+            self.afk_users[user_id] = self._deserialize(entry["data"])
+        elif op == "del":
+            self.afk_users.pop(user_id, None)
+        elif user_id in self.afk_users:
+            afk_data = self.afk_users[user_id]
+            if op == "mention":
+                afk_data["mentions"].append(entry["m"])
+                afk_data["mention_count"] += 1
+            elif op == "dm":
+                afk_data["dm_notifications"] = entry["v"]
+
+    def record(self, op, user_id, **fields):
+        """Queue one mutation for the journal"""
+        entry = {"op": op, "id": user_id, **fields}
+        if op == "set":
+            entry["data"] = self._serialize(self.afk_users[user_id])
+        self._journal_buffer.append(entry)
+
+    def flush_journal(self):
+        if not self._journal_buffer:
+            return
+        try:
+            self.journal.extend(self._journal_buffer)
+            self._journal_buffer.clear()
+        except Exception as e:
+            logger.error("Error appending AFK journal: %s", str(e))
+
+    def _snapshot_text(self):
+        return json.dumps({str(uid): self._serialize(d) for uid, d in self.afk_users.items()}, indent=4)
+
+    def _write_snapshot(self, text):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.afk_file), prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.afk_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
     def save_afk_data(self):
-        """Save AFK data to JSON file"""
+        """Write a full snapshot and truncate the journal (shutdown path)"""
         try:
-            data = {}
-            for user_id, afk_data in self.afk_users.items():
-                data[str(user_id)] = {
-                    "reason": afk_data["reason"],
-                    "time": afk_data["time"].isoformat(),
-                    "name": afk_data["name"],
-                    "guild_id": afk_data.get("guild_id"),
-                    "mentions": afk_data.get("mentions", []),
-                    "global": afk_data.get("global", False),
-                    "dm_notifications": afk_data.get("dm_notifications", True)
-                }
-            with open(self.afk_file, 'w') as f:
-                json.dump(data, f, indent=4)
+            self._write_snapshot(self._snapshot_text())
+            self.journal.rewrite([])
+            self._journal_buffer.clear()
             logger.debug("Saved %d AFK users to file", len(self.afk_users))
         except Exception as e:
             logger.error("Error saving AFK data: %s", str(e))
 
+    @tasks.loop(seconds=2)
+    async def persist_task(self):
+        """Append buffered mutations; fold them into a snapshot every snapshot_interval"""
+        if time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            self.flush_journal()
+            return
+        
+        self._last_snapshot = time.monotonic()
+        pending = len(self._journal_buffer)
+        try:
+            await asyncio.to_thread(self._write_snapshot, self._snapshot_text())
+            # Everything journaled so far is in the snapshot; newer entries are still buffered
+            self.journal.rewrite([])
+            del self._journal_buffer[:pending]
+            logger.debug("Snapshot of %d AFK users written", len(self.afk_users))
+        except Exception as e:
+            logger.error("Error writing AFK snapshot: %s", str(e))
+            self.flush_journal()
+
     def format_duration(self, delta: datetime.timedelta) -> str:
         """Format timedelta into readable string"""
         days = delta.days
@@ -112,7 +209,7 @@ class AFK(commands.Cog):
             
             afk_data = self.afk_users[member.id].copy()
             del self.afk_users[member.id]
-            self.save_afk_data()
+            self.record("del", member.id)
             
             # Restore original nickname
             try:
@@ -137,8 +234,8 @@ class AFK(commands.Cog):
             # Send DM with mention summary if enabled and not silent
             if not silent and afk_data.get("dm_notifications", True) and afk_data.get("mentions"):
                 try:
-                    mention_count = len(afk_data['mentions'])
-                    mention_list = "\n".join([f"• {m}" for m in afk_data["mentions"][-10:]])
+                    mention_count = afk_data.get("mention_count", len(afk_data["mentions"]))
+                    mention_list = "\n".join([f"• {m}" for m in list(afk_data["mentions"])[-10:]])
                     
                     embed = discord.Embed(
                         title="📬 AFK Mention Summary",
@@ -184,12 +281,13 @@ class AFK(commands.Cog):
                 "time": datetime.datetime.now(datetime.timezone.utc),
                 "name": original_name,
                 "guild_id": ctx.guild.id if not global_afk else None,
-                "mentions": [],
+                "mentions": deque(maxlen=self.MENTION_HISTORY),
+                "mention_count": 0,
                 "global": global_afk,
                 "dm_notifications": True
             }
             
-            self.save_afk_data()
+            self.record("set", member.id)
             
             # Change nickname to show AFK status
             try:
@@ -274,7 +372,7 @@ class AFK(commands.Cog):
         embed.add_field(name="📝 Reason", value=afk_data["reason"], inline=False)
         embed.add_field(name="⏱️ Duration", value=duration, inline=True)
         embed.add_field(name="🌐 Scope", value=scope, inline=True)
-        embed.add_field(name="📬 Mentions", value=str(len(afk_data.get("mentions", []))), inline=True)
+        embed.add_field(name="📬 Mentions", value=str(afk_data.get("mention_count", 0)), inline=True)
         embed.set_thumbnail(url=target.display_avatar.url)
         embed.set_footer(text="AFK since")
         
@@ -323,7 +421,7 @@ class AFK(commands.Cog):
             return await ctx.send(embed=embed, ephemeral=True)
         
         self.afk_users[ctx.author.id]["dm_notifications"] = dm_notifications
-        self.save_afk_data()
+        self.record("dm", ctx.author.id, v=dm_notifications)
         
         status = "enabled" if dm_notifications else "disabled"
         embed = discord.Embed(
@@ -332,14 +430,70 @@ class AFK(commands.Cog):
         )
         await ctx.send(embed=embed, ephemeral=True)
 
+    def build_afk_notice(self, noticed):
+        """One embed covering every AFK user mentioned in a message"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if len(noticed) == 1:
+            user, afk_info = noticed[0]
+            embed = discord.Embed(
+                title=f"💤 {user.display_name} is AFK",
+                description=f"**Reason:** {afk_info['reason']}\n**Duration:** {self.format_duration(now - afk_info['time'])}",
+                color=discord.Color.orange(),
+                timestamp=afk_info["time"]
+            )
+            embed.set_thumbnail(url=user.display_avatar.url)
+            embed.set_footer(text="AFK since")
+            return embed
+        
+        embed = discord.Embed(
+            title=f"💤 {len(noticed)} mentioned users are AFK",
+            color=discord.Color.orange(),
+            timestamp=now
+        )
+        for user, afk_info in noticed[:25]:
+            embed.add_field(
+                name=user.display_name,
+                value=f"**Reason:** {afk_info['reason']}\n**Duration:** {self.format_duration(now - afk_info['time'])}",
+                inline=False
+            )
+        return embed
+
+    async def send_mention_dm(self, user, message):
+        try:
+            dm_embed = discord.Embed(
+                title="📬 New Mention While AFK",
+                description=f"**From:** {message.author.mention} in {message.guild.name}\n"
+                           f"**Channel:** {message.channel.mention}\n"
+                           f"**Message:** {message.content[:100] if message.content else '*No content*'}...\n\n"
+                           f"[Jump to Message]({message.jump_url})",
+                color=discord.Color.blue(),
+                timestamp=datetime.datetime.now(datetime.timezone.utc)
+            )
+            await user.send(embed=dm_embed)
+        except discord.Forbidden:
+            log.warning("Cannot send DM to user %s", user.id)
+        except Exception as e:
+            log.error("Error sending DM: %s", str(e))
+
+    def _prune_cooldowns(self, now):
+        if len(self.notice_cooldowns) > 1000:
+            self.notice_cooldowns = {k: v for k, v in self.notice_cooldowns.items() if v > now}
+
     @commands.Cog.listener()
     async def on_message(self, message):
         """Handle AFK status on message send and mention notifications"""
         if message.author.bot or not message.guild:
             return
 
+        # Fast path: nothing to do unless the author or someone mentioned is AFK
+        afk_users = self.afk_users
+        if not afk_users:
+            return
+        if message.author.id not in afk_users and not any(m.id in afk_users for m in message.mentions):
+            return
+
         # Check if this message is a command - if so, ignore it for AFK removal
-        ctx = await self.bot.get_context(message)
+        ctx = await self.bot.get_message_context(message)
         if ctx.valid and ctx.command:
             return  # Don't remove AFK for command invocations
 
@@ -362,70 +516,48 @@ class AFK(commands.Cog):
                             color=discord.Color.green()
                         )
                         
-                        if removed_data.get("mentions"):
+                        if removed_data.get("mention_count"):
                             embed.add_field(
                                 name="📬 Mentions",
-                                value=f"You were mentioned **{len(removed_data['mentions'])}** time(s) while AFK.",
+                                value=f"You were mentioned **{removed_data['mention_count']}** time(s) while AFK.",
                                 inline=False
                             )
                         
                         # Send welcome back message and delete after 10 seconds
                         welcome_msg = await message.channel.send(embed=embed)
-                        await asyncio.sleep(10)
-                        try:
-                            await welcome_msg.delete()
-                        except:
-                            pass
+                        self.deletions.schedule(welcome_msg, 10)
                         
-            # Notify if mentioned user is AFK
+            # Notify if mentioned users are AFK: one combined notice per message
             if message.mentions:
+                now = time.monotonic()
+                noticed = []
                 for mentioned_user in message.mentions:
-                    if mentioned_user.id in self.afk_users:
-                        afk_info = self.afk_users[mentioned_user.id]
-                        
-                        # Check if AFK is global or specific to this guild
-                        if afk_info.get("global", False) or afk_info.get("guild_id") == message.guild.id:
-                            time_delta = datetime.datetime.now(datetime.timezone.utc) - afk_info["time"]
-                            duration = self.format_duration(time_delta)
-                            
-                            # Store mention for later notification
-                            mention_info = f"[{message.author.name} in #{message.channel.name}]({message.jump_url})"
-                            afk_info["mentions"].append(mention_info)
-                            self.save_afk_data()
-                            
-                            embed = discord.Embed(
-                                title=f"💤 {mentioned_user.display_name} is AFK",
-                                description=f"**Reason:** {afk_info['reason']}\n**Duration:** {duration}",
-                                color=discord.Color.orange(),
-                                timestamp=afk_info["time"]
-                            )
-                            embed.set_thumbnail(url=mentioned_user.display_avatar.url)
-                            embed.set_footer(text="AFK since")
-                            
-                            afk_msg = await message.channel.send(embed=embed)
-                            await asyncio.sleep(15)
-                            try:
-                                await afk_msg.delete()
-                            except:
-                                pass
-                            
-                            # Send DM to AFK user if enabled
-                            if afk_info.get("dm_notifications", True):
-                                try:
-                                    dm_embed = discord.Embed(
-                                        title="📬 New Mention While AFK",
-                                        description=f"**From:** {message.author.mention} in {message.guild.name}\n"
-                                                   f"**Channel:** {message.channel.mention}\n"
-                                                   f"**Message:** {message.content[:100] if message.content else '*No content*'}...\n\n"
-                                                   f"[Jump to Message]({message.jump_url})",
-                                        color=discord.Color.blue(),
-                                        timestamp=datetime.datetime.now(datetime.timezone.utc)
-                                    )
-                                    await mentioned_user.send(embed=dm_embed)
-                                except discord.Forbidden:
-                                    log.warning("Cannot send DM to user %s", mentioned_user.id)
-                                except Exception as e:
-                                    log.error("Error sending DM: %s", str(e))
+                    afk_info = self.afk_users.get(mentioned_user.id)
+                    if afk_info is None:
+                        continue
+                    
+                    # Check if AFK is global or specific to this guild
+                    if not (afk_info.get("global", False) or afk_info.get("guild_id") == message.guild.id):
+                        continue
+                    
+                    # Store mention for later notification
+                    mention_info = f"[{message.author.name} in #{message.channel.name}]({message.jump_url})"
+                    afk_info["mentions"].append(mention_info)
+                    afk_info["mention_count"] += 1
+                    self.record("mention", mentioned_user.id, m=mention_info)
+                    
+                    key = (message.channel.id, mentioned_user.id)
+                    if self.notice_cooldowns.get(key, 0) <= now:
+                        self.notice_cooldowns[key] = now + self.notice_cooldown
+                        noticed.append((mentioned_user, afk_info))
+                    
+                    if afk_info.get("dm_notifications", True):
+                        await self.send_mention_dm(mentioned_user, message)
+                
+                if noticed:
+                    afk_msg = await message.channel.send(embed=self.build_afk_notice(noticed))
+                    self.deletions.schedule(afk_msg, 15)
+                    self._prune_cooldowns(now)
                     
         except Exception as e:
             log.error("Error in on_message event: %s", str(e))
@@ -445,6 +577,8 @@ class AFK(commands.Cog):
 
     async def cog_unload(self):
         """Clean up when cog is unloaded"""
+        self.persist_task.cancel()
+        self.deletions.close()
         self.save_afk_data()
         logger.info("%s unloaded", self.__class__.__name__)
 
@@ -2,14 +2,16 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-import aiohttp
 import re
 import logging
 
 from io import BytesIO
-from PIL import Image
 from typing import Optional, List
 
+from utils.asset_fetcher import AssetTooLarge
+from utils.emoji_transcode import transcode_emoji, transcode_sticker
+from utils.image_worker import ImageWorkerBusy
+
 logger = logging.getLogger(__name__)
 
 # ================= REGEX =================
@@ -20,6 +22,9 @@ IMAGE_URL_REGEX = re.compile(
     re.IGNORECASE
 )
 
+# Source images bigger than this are rejected before being fully downloaded
+MAX_SOURCE_BYTES = 8 * 1024 * 1024
+
 # ================= HELPERS =================
 
 def clean_name(name: str, fallback="emoji") -> str:
@@ -29,24 +34,6 @@ def clean_name(name: str, fallback="emoji") -> str:
     return name[:32]
 
 
-def compress_emoji(data: bytes) -> bytes:
-    img = Image.open(BytesIO(data)).convert("RGBA")
-    img.thumbnail((128, 128), Image.Resampling.LANCZOS)
-    out = BytesIO()
-    img.save(out, format="PNG", optimize=True)
-    out.seek(0)
-    return out.read()
-
-
-def prepare_sticker(data: bytes) -> bytes:
-    img = Image.open(BytesIO(data)).convert("RGBA")
-    img.thumbnail((320, 320), Image.Resampling.LANCZOS)
-    out = BytesIO()
-    img.save(out, format="PNG", optimize=True)
-    out.seek(0)
-    return out.read()
-
-
 # ================= MODALS =================
 
 class EmojiNameModal(discord.ui.Modal):
@@ -129,7 +116,12 @@ class StealView(discord.ui.View):
     async def emoji_button(self, interaction: discord.Interaction, _):
         async def create(inter, name):
             try:
-                data = compress_emoji(self.image)
+                data = await self.ctx.bot.image_pool.run(transcode_emoji, self.image)
+            except ImageWorkerBusy:
+                return await inter.followup.send("⏳ Busy converting other images, try again shortly.", ephemeral=True)
+            except Exception as e:
+                return await inter.followup.send(f"❌ Couldn't convert the image: {e}", ephemeral=True)
+            try:
                 emoji = await self.ctx.guild.create_custom_emoji(
                     name=name,
                     image=data,
@@ -153,7 +145,12 @@ class StealView(discord.ui.View):
 
         async def create(inter, name, desc, emoji):
             try:
-                data = prepare_sticker(self.image)
+                data = await self.ctx.bot.image_pool.run(transcode_sticker, self.image)
+            except ImageWorkerBusy:
+                return await inter.followup.send("⏳ Busy converting other images, try again shortly.", ephemeral=True)
+            except Exception as e:
+                return await inter.followup.send(f"❌ Couldn't convert the image: {e}", ephemeral=True)
+            try:
                 file = discord.File(BytesIO(data), filename="sticker.png")
 
                 sticker = await self.ctx.guild.create_sticker(
@@ -180,23 +177,9 @@ class StealView(discord.ui.View):
 class Steal(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.session: Optional[aiohttp.ClientSession] = None
-
-    async def cog_load(self):
-        self.session = aiohttp.ClientSession()
-
-    async def cog_unload(self):
-        if self.session:
-            await self.session.close()
 
     async def fetch(self, url: str) -> Optional[bytes]:
-        try:
-            async with self.session.get(url) as r:
-                if r.status == 200:
-                    return await r.read()
-        except Exception as e:
-            logger.error("Download error: %s", e)
-        return None
+        return await self.bot.assets.fetch(url, max_size=MAX_SOURCE_BYTES, cache=False)
 
     def parse_emojis(self, text: str) -> List[dict]:
         out = []
@@ -252,13 +235,18 @@ class Steal(commands.Cog):
         if not url and ctx.message.attachments:
             att = ctx.message.attachments[0]
             if att.content_type and att.content_type.startswith("image/"):
+                if att.size > MAX_SOURCE_BYTES:
+                    return await ctx.send(f"❌ Image is too large (max {MAX_SOURCE_BYTES // (1024 * 1024)} MB).")
                 url = att.url
                 name = att.filename.split(".")[0]
 
         if not url:
             return await ctx.send("❌ No emoji or image found.")
 
-        data = await self.fetch(url)
+        try:
+            data = await self.fetch(url)
+        except AssetTooLarge:
+            return await ctx.send(f"❌ Image is too large (max {MAX_SOURCE_BYTES // (1024 * 1024)} MB).")
         if not data:
             return await ctx.send("❌ Failed to download image.")
 
@@ -0,0 +1,20 @@
+from utils.trigger_matcher import TriggerMatcher
+
+
+def test_word_boundary_with_trigger_that_grows_when_lowered():
+    # "İ".lower() is two code points, so the normalised trigger is longer than the raw one
+    matcher = TriggerMatcher(["İstanbul"], match_mode="word_boundary")
+    assert matcher.find("go İstanbul x") == ["İstanbul"]
+    assert matcher.find("goİstanbul x") == []
+
+
+def test_longest_first_with_trigger_that_grows_when_lowered():
+    # "ai" overlaps the first code point of the lowered trigger, so it must be pruned
+    matcher = TriggerMatcher(["İstanbul", "ai", "go"], priority_mode="longest_first")
+    assert matcher.find("go aİstanbul") == ["İstanbul", "go"]
+
+
+def test_case_sensitive_keeps_trigger_case():
+    matcher = TriggerMatcher(["Hello"], case_sensitive=True)
+    assert matcher.find("say Hello") == ["Hello"]
+    assert matcher.find("say hello") == []
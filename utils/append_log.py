@@ -0,0 +1,87 @@
+import json, logging, os, tempfile
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AppendLog:
+    """Append-only JSON-lines file with bounded size.
+
+    Each record is one line, so logging costs a single small append instead of
+    re-reading and rewriting the whole history. Once the file holds
+    ``compact_at`` records it is rewritten (temp file + rename) with only the
+    newest ``keep``, which spreads the cost of trimming over many appends.
+    A torn last line from a crash is skipped when reading. With
+    ``compact_at=None`` the log is only trimmed when the owner rewrites it
+    (e.g. a journal truncated after each snapshot).
+    """
+
+    def __init__(self, path: str, keep: int = 1000, compact_at: Optional[int] = 2000):
+        self.path = path
+        self.keep = keep
+        self.compact_at = max(compact_at, keep + 1) if compact_at is not None else None
+        self._count: Optional[int] = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            try:
+                with open(self.path, "rb") as f:
+                    self._count = sum(1 for _ in f)
+            except FileNotFoundError:
+                self._count = 0
+        return self._count
+
+    def append(self, record):
+        self.extend([record])
+
+    def extend(self, records: Iterable):
+        lines = [json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records]
+        if not lines:
+            return
+        count = len(self)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+        self._count = count + len(lines)
+        if self.compact_at is not None and self._count >= self.compact_at:
+            self.compact()
+
+    def read(self) -> List:
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def rewrite(self, records: List):
+        """Atomically replace the log with ``records``."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._count = len(records)
+
+    def compact(self):
+        try:
+            self.rewrite(self.read()[-self.keep:])
+        except Exception as e:
+            logger.error(f"Error compacting {self.path}: {e}")
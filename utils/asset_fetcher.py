@@ -0,0 +1,125 @@
+import asyncio, logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class AssetTooLarge(Exception):
+    """The asset is bigger than the caller's ``max_size``; it was not (fully) downloaded."""
+
+
+class AssetFetcher:
+    """Downloads avatars and other CDN assets on the bot's shared session.
+
+    Bytes are kept in an LRU bounded by ``max_bytes`` (items over
+    ``max_item_bytes`` are returned but not cached). Concurrent requests for
+    the same key share one download. Avatars are keyed by asset hash and
+    size, so a changed avatar is a new key and stale bytes simply age out.
+    """
+
+    def __init__(self, bot, max_bytes: int = 32 * 1024 * 1024, max_item_bytes: int = 4 * 1024 * 1024,
+                 timeout: float = 15.0):
+        self.bot = bot
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def avatar_key(asset: discord.Asset, size: int) -> str:
+        return f"{asset.key}:{size}"
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_item_bytes:
+            return
+        self._cache[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes and self._cache:
+            _, old = self._cache.popitem(last=False)
+            self.bytes -= len(old)
+
+    async def _download(self, url: str, max_size: Optional[int] = None) -> Optional[bytes]:
+        session = self.bot.session
+        if session is None or session.closed:
+            logger.error("Asset fetch attempted without an open HTTP session")
+            return None
+        try:
+            async with session.get(url, timeout=self.timeout) as resp:
+                if resp.status != 200:
+                    logger.debug(f"Asset fetch {url} returned HTTP {resp.status}")
+                    return None
+                if max_size is None:
+                    return await resp.read()
+                # Reject by header first, then stream so an oversized body is never fully read
+                if resp.content_length is not None and resp.content_length > max_size:
+                    raise AssetTooLarge(f"{resp.content_length} bytes")
+                buffer = bytearray()
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    buffer += chunk
+                    if len(buffer) > max_size:
+                        raise AssetTooLarge(f"over {max_size} bytes")
+                return bytes(buffer)
+        except AssetTooLarge:
+            raise
+        except Exception as e:
+            logger.error(f"Error downloading {url}: {e}")
+        return None
+
+    async def fetch(self, url: str, key: Optional[str] = None, max_size: Optional[int] = None,
+                    cache: bool = True) -> Optional[bytes]:
+        """Bytes at ``url`` (cached under ``key``, default the url), or None on failure.
+
+        With ``max_size``, raises :class:`AssetTooLarge` as soon as the asset is
+        known to exceed it. ``cache=False`` is for one-off, user-supplied URLs:
+        the download is still coalesced but the bytes are not kept.
+        """
+        key = key or url
+        if max_size is not None:
+            key = f"{key}|{max_size}"
+        data = self._cache.get(key) if cache else None
+        if data is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return data
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._download(url, max_size)
+            if data is not None and cache:
+                self._remember(key, data)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def fetch_avatar(self, asset: discord.Asset, size: int = 256) -> Tuple[str, Optional[bytes]]:
+        """(cache key, static PNG bytes) for an avatar at ``size`` px."""
+        key = self.avatar_key(asset, size)
+        return key, await self.fetch(asset.replace(size=size, format="png").url, key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "coalesced": self.coalesced, "inflight": len(self._inflight)}
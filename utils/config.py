@@ -6,6 +6,9 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 LOG_CHANNEL_ID = os.getenv('LOG_CHANNEL_ID')
 DATABASE_ENABLED = os.getenv('DATABASE_ENABLED', 'false').lower() == 'true'
+# Opt-in: keep snipes in SQLite (needs DATABASE_ENABLED) so they survive restarts
+SNIPE_PERSISTENCE = os.getenv('SNIPE_PERSISTENCE', 'false').lower() == 'true'
+SNIPE_RETENTION_HOURS = float(os.getenv('SNIPE_RETENTION_HOURS', '72'))
 
 
 OWNER_ID = 1013851779886231685
@@ -1,129 +1,394 @@
-import sqlite3, threading, logging
-from typing import Dict, List
+import asyncio, queue, sqlite3, threading, logging, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Schema migrations, applied in order once at startup. The applied version is
+# tracked in PRAGMA user_version, so add new steps to the end of this list and
+# never edit a step that has already shipped.
+MIGRATIONS: List[Sequence[str]] = [
+    # 1: base schema
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS personalities (
+            channel_id TEXT PRIMARY KEY,
+            personality TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS message_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_id TEXT NOT NULL,
+            author TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS bot_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            stat_name TEXT NOT NULL,
+            stat_value INTEGER NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ),
+    # 2: channel history lookups
+    (
+        'CREATE INDEX IF NOT EXISTS idx_message_history_channel_ts ON message_history (channel_id, timestamp)',
+    ),
+    # 3: per-author history lookups and retention trimming stay on the index
+    (
+        'CREATE INDEX IF NOT EXISTS idx_message_history_channel_author_ts ON message_history (channel_id, author, timestamp)',
+    ),
+    # 4: durable snipe history (ts is unix seconds; the ts index keeps the TTL purge off a full scan)
+    (
+        '''
+        CREATE TABLE IF NOT EXISTS snipes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            author_id INTEGER NOT NULL,
+            author_name TEXT NOT NULL,
+            avatar_url TEXT,
+            content TEXT NOT NULL DEFAULT '',
+            after TEXT,
+            attachments TEXT NOT NULL DEFAULT '[]',
+            sticker_count INTEGER NOT NULL DEFAULT 0,
+            jump_url TEXT,
+            emoji TEXT,
+            target_name TEXT,
+            ts REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_snipes_guild_channel_ts ON snipes (guild_id, channel_id, ts)',
+        'CREATE INDEX IF NOT EXISTS idx_snipes_guild_author_ts ON snipes (guild_id, author_id, ts)',
+        'CREATE INDEX IF NOT EXISTS idx_snipes_ts ON snipes (ts)',
+    ),
+]
+
+SNIPE_COLUMNS = ('kind', 'message_id', 'guild_id', 'channel_id', 'author_id', 'author_name', 'avatar_url',
+                 'content', 'after', 'attachments', 'sticker_count', 'jump_url', 'emoji', 'target_name', 'ts')
+
+
 class DatabaseManager:
-    def __init__(self, enabled: bool = True):
+    """SQLite access for the bot.
+
+    A small pool of long-lived WAL-mode connections is shared by a dedicated
+    thread executor; every public method is a coroutine so cogs never block
+    the gateway loop on disk I/O.
+
+    ``add_message`` and ``add_snipe`` are write-behind: rows are buffered in
+    memory and written with a single ``executemany`` every ``flush_interval``
+    seconds or once ``batch_size`` rows are queued. Retention (``history_limit`` rows per
+    channel/author) is enforced by a periodic bulk trim of the pairs that
+    received new rows, instead of a DELETE after every insert.
+    """
+
+    def __init__(self, enabled: bool = True, db_path: str = 'bot_data.db', pool_size: int = 3,
+                 batch_size: int = 200, flush_interval: float = 0.5,
+                 history_limit: int = 20, trim_interval: float = 60.0):
         self.enabled = enabled
-        self.db_path = 'bot_data.db'
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.history_limit = history_limit
+        self.trim_interval = trim_interval
+        self._message_buffer: List[Tuple[str, str, str, str]] = []
+        self._snipe_buffer: List[Sequence] = []
+        self._trim_keys: Set[Tuple[str, str]] = set()
+        self._buffer_full: Optional[asyncio.Event] = None
+        self._writer_task: Optional[asyncio.Task] = None
         self.lock = threading.Lock()
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._connections: List[sqlite3.Connection] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
         if self.enabled:
             self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
     def init_database(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS personalities (
-                        channel_id TEXT PRIMARY KEY,
-                        personality TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS message_history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        channel_id TEXT NOT NULL,
-                        author TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS bot_stats (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        stat_name TEXT NOT NULL,
-                        stat_value INTEGER NOT NULL,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                conn.commit()
-                logger.info("Database initialized successfully")
+            conn = self._connect()
+            self._migrate(conn)
+            self._connections.append(conn)
+            self._pool.put(conn)
+            for _ in range(self.pool_size - 1):
+                extra = self._connect()
+                self._connections.append(extra)
+                self._pool.put(extra)
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="sqlite")
+            logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             self.enabled = False
 
-    def save_personality(self, channel_id: str, personality: str):
+    def _migrate(self, conn: sqlite3.Connection):
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            with conn:
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute(f'PRAGMA user_version = {target}')
+            logger.info(f"Applied database migration {target}")
+
+    # --- Core helpers ---
+
+    def _with_connection(self, fn: Callable[[sqlite3.Connection], Any]):
+        conn = self._pool.get()
+        try:
+            return fn(conn)
+        finally:
+            self._pool.put(conn)
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]):
+        """Run ``fn(conn)`` on a pooled connection in the database executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._with_connection, fn)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        def op(conn):
+            with conn:
+                return conn.execute(sql, params).rowcount
+        return await self.run(op)
+
+    async def executemany(self, sql: str, rows: Iterable[Sequence]) -> int:
+        rows = list(rows)
+        def op(conn):
+            with conn:
+                return conn.executemany(sql, rows).rowcount
+        return await self.run(op)
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def table_exists(self, name: str) -> bool:
+        row = await self.fetchone("SELECT name FROM sqlite_master WHERE type='table' AND name = ?", (name,))
+        return row is not None
+
+    def close(self):
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self.enabled and self._connections:
+            try:
+                rows, keys, snipes = self._drain_buffer(trim=True)
+                self._with_connection(lambda conn: self._write_batch(conn, rows, keys, snipes))
+            except Exception as e:
+                logger.error(f"Error flushing message history on close: {e}")
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for conn in self._connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.error(f"Error closing database connection: {e}")
+        self._connections.clear()
+
+    # --- Bot data ---
+
+    async def save_personality(self, channel_id: str, personality: str):
         if not self.enabled: return
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO personalities (channel_id, personality, updated_at)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                ''', (channel_id, personality))
-                conn.commit()
+            await self.execute('''
+                INSERT OR REPLACE INTO personalities (channel_id, personality, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (channel_id, personality))
         except Exception as e:
             logger.error(f"Error saving personality: {e}")
 
-    def load_personalities(self) -> Dict[str, str]:
+    async def load_personalities(self) -> Dict[str, str]:
         if not self.enabled: return {}
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT channel_id, personality FROM personalities')
-                return dict(cursor.fetchall())
+            rows = await self.fetchall('SELECT channel_id, personality FROM personalities')
+            return {row['channel_id']: row['personality'] for row in rows}
         except Exception as e:
             logger.error(f"Error loading personalities: {e}")
             return {}
 
-    def delete_personality(self, channel_id: str):
+    async def delete_personality(self, channel_id: str):
         if not self.enabled: return
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM personalities WHERE channel_id = ?', (channel_id,))
-                conn.commit()
+            await self.execute('DELETE FROM personalities WHERE channel_id = ?', (channel_id,))
         except Exception as e:
             logger.error(f"Error deleting personality: {e}")
 
-    def add_message(self, channel_id: str, author: str, content: str):
+    # --- Message history (write-behind) ---
+
+    async def add_message(self, channel_id: str, author: str, content: str):
         if not self.enabled: return
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO message_history (channel_id, author, content)
-                    VALUES (?, ?, ?)
-                ''', (channel_id, author, content[:500]))
-                conn.commit()
-                cursor.execute('''
-                    DELETE FROM message_history 
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self._message_buffer.append((channel_id, author, content[:500], timestamp))
+        self._ensure_writer()
+        if len(self._message_buffer) >= self.batch_size:
+            self._buffer_full.set()
+
+    def _ensure_writer(self):
+        if self._writer_task is None or self._writer_task.done():
+            self._buffer_full = asyncio.Event()
+            self._writer_task = asyncio.get_running_loop().create_task(self._message_writer())
+
+    async def _message_writer(self):
+        last_trim = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._buffer_full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._buffer_full.clear()
+            trim = time.monotonic() - last_trim >= self.trim_interval
+            try:
+                await self.flush_messages(trim=trim)
+            except Exception as e:
+                logger.error(f"Error flushing message history: {e}")
+            if trim:
+                last_trim = time.monotonic()
+
+    def _drain_buffer(self, trim: bool):
+        rows, self._message_buffer = self._message_buffer, []
+        snipes, self._snipe_buffer = self._snipe_buffer, []
+        self._trim_keys.update((channel_id, author) for channel_id, author, _, _ in rows)
+        keys = set()
+        if trim:
+            keys, self._trim_keys = self._trim_keys, set()
+        return rows, keys, snipes
+
+    def _write_batch(self, conn: sqlite3.Connection, rows, trim_keys, snipes=()):
+        with conn:
+            if snipes:
+                conn.executemany(self._snipe_insert, snipes)
+            if rows:
+                conn.executemany('''
+                    INSERT INTO message_history (channel_id, author, content, timestamp)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+            if trim_keys:
+                conn.executemany('''
+                    DELETE FROM message_history
                     WHERE channel_id = ? AND author = ? AND id NOT IN (
-                        SELECT id FROM message_history 
+                        SELECT id FROM message_history
                         WHERE channel_id = ? AND author = ?
-                        ORDER BY timestamp DESC 
-                        LIMIT 20
+                        ORDER BY timestamp DESC, id DESC
+                        LIMIT ?
                     )
-                ''', (channel_id, author, channel_id, author))
-                conn.commit()
-        except Exception as e:
-            logger.error(f"Error adding message: {e}")
+                ''', [(c, a, c, a, self.history_limit) for c, a in trim_keys])
 
-    def get_recent_messages(self, channel_id: str, author: str = None, limit: int = 10) -> List[Dict]:
+    async def flush_messages(self, trim: bool = False):
+        """Write buffered history rows now; with ``trim`` also enforce retention."""
+        if not self.enabled: return
+        rows, keys, snipes = self._drain_buffer(trim)
+        if rows or keys or snipes:
+            await self.run(lambda conn: self._write_batch(conn, rows, keys, snipes))
+
+    async def get_recent_messages(self, channel_id: str, author: str = None, limit: int = 10) -> List[Dict]:
         if not self.enabled: return []
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                if author:
-                    cursor.execute('''
-                        SELECT author, content, timestamp FROM message_history
-                        WHERE channel_id = ? AND author = ?
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                    ''', (channel_id, author, limit))
-                else:
-                    cursor.execute('''
-                        SELECT author, content, timestamp FROM message_history
-                        WHERE channel_id = ?
-                        ORDER BY timestamp DESC
-                        LIMIT ?
-                    ''', (channel_id, limit))
-                rows = cursor.fetchall()
-                messages = [{'author': a, 'content': c, 'timestamp': t} for (a, c, t) in rows]
-                return list(reversed(messages))
+            # Read-your-writes: make buffered rows visible before querying
+            await self.flush_messages()
+            if author:
+                rows = await self.fetchall('''
+                    SELECT author, content, timestamp FROM message_history
+                    WHERE channel_id = ? AND author = ?
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                ''', (channel_id, author, limit))
+            else:
+                rows = await self.fetchall('''
+                    SELECT author, content, timestamp FROM message_history
+                    WHERE channel_id = ?
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                ''', (channel_id, limit))
+            messages = [{'author': a, 'content': c, 'timestamp': t} for (a, c, t) in rows]
+            return list(reversed(messages))
         except Exception as e:
             logger.error(f"Error getting recent messages: {e}")
             return []
+
+    # --- Snipe history (write-behind, opt-in) ---
+
+    _snipe_insert = (f"INSERT INTO snipes ({', '.join(SNIPE_COLUMNS)}) "
+                     f"VALUES ({', '.join('?' * len(SNIPE_COLUMNS))})")
+
+    async def add_snipe(self, row: Sequence):
+        """Queue one snipe row (values in ``SNIPE_COLUMNS`` order)."""
+        if not self.enabled: return
+        self._snipe_buffer.append(tuple(row))
+        self._ensure_writer()
+        if len(self._snipe_buffer) >= self.batch_size:
+            self._buffer_full.set()
+
+    async def get_snipes(self, guild_id: int, kind: str, channel_id: int = None, author_id: int = None,
+                         since: float = 0, limit: int = 10) -> List[sqlite3.Row]:
+        """Newest snipes of ``kind`` in a guild, by channel or by author (both are indexed)."""
+        if not self.enabled: return []
+        try:
+            await self.flush_messages()
+            where, params = 'guild_id = ?', [guild_id]
+            if channel_id is not None:
+                where += ' AND channel_id = ?'
+                params.append(channel_id)
+            if author_id is not None:
+                where += ' AND author_id = ?'
+                params.append(author_id)
+            params += [since, kind, limit]
+            return await self.fetchall(f'''
+                SELECT {', '.join(SNIPE_COLUMNS)} FROM snipes
+                WHERE {where} AND ts >= ? AND kind = ?
+                ORDER BY ts DESC
+                LIMIT ?
+            ''', params)
+        except Exception as e:
+            logger.error(f"Error getting snipes: {e}")
+            return []
+
+    async def load_snipes(self, since: float, limit: int) -> List[sqlite3.Row]:
+        """The newest ``limit`` snipes since ``since``, oldest first (for warming memory)."""
+        if not self.enabled: return []
+        try:
+            rows = await self.fetchall(f'''
+                SELECT {', '.join(SNIPE_COLUMNS)} FROM snipes
+                WHERE ts >= ?
+                ORDER BY ts DESC
+                LIMIT ?
+            ''', (since, limit))
+            return list(reversed(rows))
+        except Exception as e:
+            logger.error(f"Error loading snipes: {e}")
+            return []
+
+    async def delete_snipes(self, guild_id: int, channel_id: int) -> int:
+        if not self.enabled: return 0
+        try:
+            await self.flush_messages()
+            return await self.execute('DELETE FROM snipes WHERE guild_id = ? AND channel_id = ?', (guild_id, channel_id))
+        except Exception as e:
+            logger.error(f"Error deleting snipes: {e}")
+            return 0
+
+    async def purge_snipes(self, before: float) -> int:
+        """TTL purge: drop snipes older than ``before`` (unix seconds)."""
+        if not self.enabled: return 0
+        try:
+            return await self.execute('DELETE FROM snipes WHERE ts < ?', (before,))
+        except Exception as e:
+            logger.error(f"Error purging snipes: {e}")
+            return 0
@@ -0,0 +1,56 @@
+import asyncio, heapq, itertools, logging, time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionQueue:
+    """Deletes short-lived bot messages after a delay.
+
+    One sleeper task serves every pending deletion (a min-heap ordered by due
+    time), instead of each listener sleeping until its own message can be
+    removed.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def schedule(self, message: discord.Message, delay: float):
+        due = time.monotonic() + delay
+        heapq.heappush(self._heap, (due, next(self._counter), message))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        elif self._heap[0][2] is message:
+            self._wakeup.set()
+
+    async def _run(self):
+        heap = self._heap
+        while heap:
+            wait = heap[0][0] - time.monotonic()
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, message = heapq.heappop(heap)
+            try:
+                await message.delete()
+            except (discord.NotFound, discord.Forbidden):
+                pass
+            except discord.HTTPException as e:
+                logger.debug(f"Could not delete message {message.id}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+        self._heap.clear()
@@ -0,0 +1,83 @@
+import io
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageSequence
+
+EMOJI_MAX_BYTES = 256 * 1024
+STICKER_MAX_BYTES = 512 * 1024
+MAX_SOURCE_PIXELS = 4096 * 4096
+MAX_FRAMES = 500
+
+# Tried in order until the result fits: full palette first, then fewer colors, then smaller sizes
+EMOJI_SIZES = (128, 112, 96, 80, 64, 48, 32)
+STICKER_SIZES = (320, 288, 256, 224, 192, 160)
+PALETTES = (None, 256, 128, 64, 32)
+
+
+def _open(data: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(data))
+    if img.width * img.height > MAX_SOURCE_PIXELS:
+        raise ValueError(f"Image is too large ({img.width}x{img.height})")
+    return img
+
+
+def _is_animated(img: Image.Image) -> bool:
+    return getattr(img, "is_animated", False) and getattr(img, "n_frames", 1) > 1
+
+
+def _frames(img: Image.Image, size: int) -> Tuple[List[Image.Image], List[int]]:
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(img):
+        if len(frames) >= MAX_FRAMES:
+            break
+        converted = frame.convert("RGBA")
+        converted.thumbnail((size, size), Image.Resampling.LANCZOS)
+        frames.append(converted)
+        durations.append(frame.info.get("duration", img.info.get("duration", 100)) or 100)
+    return frames, durations
+
+
+def _encode_static(img: Image.Image, colors: Optional[int]) -> bytes:
+    if colors:
+        img = img.quantize(colors, method=Image.Quantize.FASTOCTREE)
+    out = io.BytesIO()
+    img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def _encode_gif(frames: List[Image.Image], durations: List[int], loop: int, colors: Optional[int]) -> bytes:
+    if colors:
+        frames = [f.quantize(colors, method=Image.Quantize.FASTOCTREE) for f in frames]
+    out = io.BytesIO()
+    frames[0].save(out, format="GIF", save_all=True, append_images=frames[1:], duration=durations,
+                   loop=loop, disposal=2, optimize=True)
+    return out.getvalue()
+
+
+def _fit(data: bytes, sizes: Tuple[int, ...], max_bytes: int, keep_animation: bool) -> bytes:
+    img = _open(data)
+    animated = keep_animation and _is_animated(img)
+    loop = img.info.get("loop", 0)
+    static = None if animated else img.convert("RGBA")
+
+    for size in sizes:
+        if animated:
+            frames, durations = _frames(img, size)
+        else:
+            frame = static.copy()
+            frame.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for colors in PALETTES:
+            encoded = _encode_gif(frames, durations, loop, colors) if animated else _encode_static(frame, colors)
+            if len(encoded) <= max_bytes:
+                return encoded
+    raise ValueError(f"Couldn't get the image under {max_bytes // 1024} KB")
+
+
+def transcode_emoji(data: bytes) -> bytes:
+    """Emoji-ready bytes: a GIF keeping every frame for animated sources, else a static PNG."""
+    return _fit(data, EMOJI_SIZES, EMOJI_MAX_BYTES, keep_animation=True)
+
+
+def transcode_sticker(data: bytes) -> bytes:
+    """Static PNG sticker up to 320px that fits the sticker upload limit."""
+    return _fit(data, STICKER_SIZES, STICKER_MAX_BYTES, keep_animation=False)
@@ -0,0 +1,143 @@
+import asyncio, logging, multiprocessing, os, time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ImageWorkerBusy(Exception):
+    """Every render slot stayed taken for longer than ``queue_timeout``."""
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    # Runs inside the worker, so the measured time excludes queueing and pickling
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class JobStats:
+    __slots__ = ("count", "failures", "run_total", "run_max", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, run: float, wait: float):
+        self.count += 1
+        self.run_total += run
+        self.run_max = max(self.run_max, run)
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def as_dict(self) -> Dict[str, float]:
+        count = self.count or 1
+        return {
+            "count": self.count, "failures": self.failures,
+            "run_avg_ms": self.run_total / count * 1000, "run_max_ms": self.run_max * 1000,
+            "wait_avg_ms": self.wait_total / count * 1000, "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+class ImageWorkerPool:
+    """CPU-bound image work off the event loop.
+
+    Jobs are module-level functions that take and return plain data (bytes,
+    str, numbers), so they can run in a process pool and use every core. If
+    processes can't be started (or the pool breaks), the pool falls back to
+    threads. At most ``max_pending`` jobs are queued or running; further
+    callers wait for a slot, and get :class:`ImageWorkerBusy` after
+    ``queue_timeout`` seconds. Run and queue times are recorded per job name.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 queue_timeout: float = 10.0, use_processes: bool = True):
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.max_pending = max_pending or self.max_workers * 4
+        self.queue_timeout = queue_timeout
+        self.use_processes = use_processes
+        self.mode: Optional[str] = None
+        self.pending = 0
+        self.rejected = 0
+        self.stats: Dict[str, JobStats] = {}
+        self._executor = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _start(self):
+        if self.use_processes:
+            try:
+                # spawn everywhere: forking a process with live gateway/database threads is unsafe
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+                self.mode = "process"
+                return
+            except (OSError, NotImplementedError, ValueError) as e:
+                logger.warning(f"Image process pool unavailable ({e}); using threads")
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="image")
+        self.mode = "thread"
+
+    def _fall_back(self, broken, error: BaseException):
+        # Many in-flight jobs see the same broken pool; only the first one swaps executors
+        if broken is not self._executor or self.mode != "process":
+            return
+        logger.warning(f"Image process pool failed ({error!r}); falling back to threads")
+        self.use_processes = False
+        self._start()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn: Callable, args: tuple, kwargs: dict) -> Tuple[Executor, Future]:
+        """Submit a job; returns the executor it went to along with its future."""
+        if self._executor is None:
+            self._start()
+        executor = self._executor
+        try:
+            return executor, executor.submit(_timed_call, fn, args, kwargs)
+        except (OSError, RuntimeError) as e:
+            if self.mode != "process":
+                raise
+            self._fall_back(executor, e)
+            executor = self._executor
+            return executor, executor.submit(_timed_call, fn, args, kwargs)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in a worker and return its result."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        stats = self.stats.setdefault(fn.__name__, JobStats())
+        queued = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ImageWorkerBusy(f"{self.max_pending} image jobs already pending")
+
+        self.pending += 1
+        try:
+            executor, future = self._submit(fn, args, kwargs)
+            try:
+                result, run_time = await asyncio.wrap_future(future)
+            except BrokenProcessPool as e:
+                self._fall_back(executor, e)
+                _, future = self._submit(fn, args, kwargs)
+                result, run_time = await asyncio.wrap_future(future)
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+        stats.record(run_time, max(0.0, time.perf_counter() - queued - run_time))
+        return result
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: job.as_dict() for name, job in self.stats.items()}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,199 @@
+import bisect, difflib, logging, random
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+def _name_keys(member: discord.Member) -> Tuple[str, ...]:
+    names = {member.name, member.global_name, member.nick}
+    return tuple(sorted({n.casefold() for n in names if n}))
+
+
+class GuildMemberIndex:
+    """Name and human-member lookups for one guild.
+
+    ``_names`` maps each casefolded username / global name / nick to member
+    ids (exact lookups), and ``_sorted`` holds the same (key, id) pairs in
+    order for prefix lookups by bisection. ``_humans`` is a dense list of
+    non-bot ids with a position map, so a random pick is O(1) and removal is
+    a swap with the last element.
+    """
+
+    __slots__ = ("_names", "_sorted", "_keys", "_humans", "_human_pos")
+
+    def __init__(self, members=()):
+        self._names: Dict[str, Set[int]] = {}
+        self._sorted: List[Tuple[str, int]] = []
+        self._keys: Dict[int, Tuple[str, ...]] = {}
+        self._humans: List[int] = []
+        self._human_pos: Dict[int, int] = {}
+        for member in members:
+            keys = _name_keys(member)
+            self._keys[member.id] = keys
+            for key in keys:
+                self._names.setdefault(key, set()).add(member.id)
+                self._sorted.append((key, member.id))
+            if not member.bot:
+                self._human_pos[member.id] = len(self._humans)
+                self._humans.append(member.id)
+        self._sorted.sort()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # --- Maintenance ---
+
+    def add(self, member: discord.Member):
+        if member.id in self._keys:
+            self.remove(member.id)
+        keys = _name_keys(member)
+        self._keys[member.id] = keys
+        for key in keys:
+            self._names.setdefault(key, set()).add(member.id)
+            bisect.insort(self._sorted, (key, member.id))
+        if not member.bot:
+            self._human_pos[member.id] = len(self._humans)
+            self._humans.append(member.id)
+
+    def remove(self, member_id: int):
+        keys = self._keys.pop(member_id, None)
+        if keys is None:
+            return
+        for key in keys:
+            ids = self._names.get(key)
+            if ids is not None:
+                ids.discard(member_id)
+                if not ids:
+                    del self._names[key]
+            i = bisect.bisect_left(self._sorted, (key, member_id))
+            if i < len(self._sorted) and self._sorted[i] == (key, member_id):
+                del self._sorted[i]
+        pos = self._human_pos.pop(member_id, None)
+        if pos is not None:
+            last = self._humans.pop()
+            if last != member_id:
+                self._humans[pos] = last
+                self._human_pos[last] = pos
+
+    def needs_update(self, member: discord.Member) -> bool:
+        return self._keys.get(member.id) != _name_keys(member) or (member.id in self._human_pos) == member.bot
+
+    # --- Lookups ---
+
+    def exact(self, name: str) -> Set[int]:
+        return set(self._names.get(name.casefold(), ()))
+
+    def prefix(self, prefix: str, limit: int = 25) -> List[int]:
+        prefix = prefix.casefold()
+        ids: List[int] = []
+        i = bisect.bisect_left(self._sorted, (prefix,))
+        while i < len(self._sorted) and len(ids) < limit:
+            key, member_id = self._sorted[i]
+            if not key.startswith(prefix):
+                break
+            if member_id not in ids:
+                ids.append(member_id)
+            i += 1
+        return ids
+
+    def fuzzy(self, name: str, limit: int = 5, cutoff: float = 0.75) -> List[int]:
+        """Closest names by similarity ratio. Scans every name, so prefer exact/prefix first."""
+        ids: List[int] = []
+        for key in difflib.get_close_matches(name.casefold(), self._names.keys(), n=limit, cutoff=cutoff):
+            ids.extend(i for i in self._names[key] if i not in ids)
+        return ids[:limit]
+
+    def random_human(self, exclude: Optional[int] = None) -> Optional[int]:
+        humans = self._humans
+        if not humans or (len(humans) == 1 and humans[0] == exclude):
+            return None
+        while True:
+            member_id = random.choice(humans)
+            if member_id != exclude:
+                return member_id
+
+
+class MemberIndex:
+    """Per-guild member name index shared by cogs (``bot.member_index``).
+
+    A guild is indexed from its member cache on first use once it is fully
+    chunked, then kept current from member join/update/remove and user update
+    events instead of being rescanned per command.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._guilds: Dict[int, GuildMemberIndex] = {}
+        bot.add_listener(self.on_member_join)
+        bot.add_listener(self.on_member_remove)
+        bot.add_listener(self.on_member_update)
+        bot.add_listener(self.on_user_update)
+        bot.add_listener(self.on_guild_remove)
+
+    def for_guild(self, guild: discord.Guild) -> GuildMemberIndex:
+        index = self._guilds.get(guild.id)
+        if index is None:
+            if not guild.chunked:
+                # Members still arriving in chunks don't fire on_member_join, so an index
+                # kept now would miss them; build a throwaway one until the cache is complete
+                return GuildMemberIndex(guild.members)
+            index = self._guilds[guild.id] = GuildMemberIndex(guild.members)
+            logger.debug(f"Indexed {len(index)} members of guild {guild.id}")
+        return index
+
+    # --- Resolution helpers ---
+
+    def find(self, guild: discord.Guild, name: str, fuzzy: bool = False, humans_only: bool = True) -> Optional[discord.Member]:
+        """Member whose username, global name or nick matches ``name`` (case-insensitive)."""
+        index = self.for_guild(guild)
+        ids = sorted(index.exact(name))
+        if not ids and fuzzy:
+            ids = index.prefix(name, limit=5) or index.fuzzy(name)
+        for member_id in ids:
+            member = guild.get_member(member_id)
+            if member and not (humans_only and member.bot):
+                return member
+        return None
+
+    def random_human(self, guild: discord.Guild, exclude: Optional[int] = None) -> Optional[discord.Member]:
+        index = self.for_guild(guild)
+        for _ in range(5):  # the cache and index can briefly disagree around member events
+            member_id = index.random_human(exclude)
+            if member_id is None:
+                return None
+            member = guild.get_member(member_id)
+            if member:
+                return member
+            index.remove(member_id)
+        return None
+
+    # --- Listeners ---
+
+    async def on_member_join(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.add(member)
+
+    async def on_member_remove(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.remove(member.id)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        index = self._guilds.get(after.guild.id)
+        if index is not None and index.needs_update(after):
+            index.add(after)
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        if before.name == after.name and before.global_name == after.global_name:
+            return
+        for guild_id, index in self._guilds.items():
+            guild = self.bot.get_guild(guild_id)
+            member = guild.get_member(after.id) if guild else None
+            if member is not None:
+                index.add(member)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._guilds.pop(guild.id, None)
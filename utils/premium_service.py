@@ -0,0 +1,130 @@
+import heapq, logging, os, time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREMIUM_FILE = os.path.join("data", "premium.json")
+
+
+def default_premium_data():
+    return {"subscriptions": {}, "vanity": {"roles": {}, "settings": {}}, "grandfathered": []}
+
+
+class Entitlement:
+    __slots__ = ("tier", "expires_at", "grandfathered", "active")
+
+    def __init__(self, tier: str, expires_at: Optional[float], grandfathered: bool):
+        self.tier = tier
+        self.expires_at = expires_at
+        self.grandfathered = grandfathered
+        self.active = grandfathered or tier != "FREE"
+
+
+class PremiumService:
+    """Single source of truth for guild premium entitlements.
+
+    premium.json is parsed once into a dict keyed by guild id, so checks are
+    O(1). Expiry times sit in a min-heap; every lookup pops the entries that
+    have lapsed and flips those guilds to FREE. The backing document lives in
+    the shared SettingsStore; edits made to premium.json outside the bot are
+    picked up only through :meth:`reload`.
+    """
+
+    def __init__(self, store, path: str = PREMIUM_FILE):
+        self.store = store
+        self.path = path
+        self._entitlements: Dict[int, Entitlement] = {}
+        self._expiry_heap: List[Tuple[float, int]] = []
+        self._rebuild()
+
+    # --- Loading ---
+
+    def data(self) -> dict:
+        """The raw premium.json document (shared, cached)."""
+        return self.store.get(self.path, default_premium_data)
+
+    def save(self, data: dict):
+        """Persist premium.json through the settings store and re-index it."""
+        self.store.set(self.path, data)
+        self._rebuild()
+
+    def reload(self):
+        """Re-read premium.json from disk (after editing it by hand) and re-index it.
+
+        Pending in-memory changes are written first, so nothing granted through
+        the bot is lost.
+        """
+        self.store.invalidate(self.path)
+        self._rebuild()
+
+    @staticmethod
+    def _parse_expiry(value) -> Optional[float]:
+        if not value or value == "null":
+            return None
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def _rebuild(self):
+        data = self.store.get(self.path, default_premium_data)
+        entitlements = {}
+        heap = []
+        for gid in data.get("grandfathered", []):
+            entitlements[int(gid)] = Entitlement("GRANDFATHERED", None, True)
+        for gid, sub in data.get("subscriptions", {}).items():
+            try:
+                guild_id = int(gid)
+            except ValueError:
+                continue
+            if guild_id in entitlements:
+                continue
+            expires_at = self._parse_expiry(sub.get("expires_at"))
+            entitlements[guild_id] = Entitlement(str(sub.get("tier", "FREE")).upper(), expires_at, False)
+            if expires_at is not None:
+                heap.append((expires_at, guild_id))
+        heapq.heapify(heap)
+        self._entitlements = entitlements
+        self._expiry_heap = heap
+        self._expire(time.time())
+        logger.info(f"Indexed {len(entitlements)} premium entitlements")
+
+    def _expire(self, now: float):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, guild_id = heapq.heappop(heap)
+            ent = self._entitlements.get(guild_id)
+            if ent and ent.expires_at == expires_at and not ent.grandfathered:
+                ent.active = False
+                logger.info(f"Premium expired for guild {guild_id} ({ent.tier})")
+
+    def _lookup(self, guild_id) -> Optional[Entitlement]:
+        if self._expiry_heap:
+            self._expire(time.time())
+        return self._entitlements.get(int(guild_id))
+
+    # --- Queries ---
+
+    def is_premium(self, guild_id) -> bool:
+        ent = self._lookup(guild_id)
+        return bool(ent and ent.active)
+
+    def get_tier(self, guild_id) -> str:
+        """Effective tier: GRANDFATHERED, the paid tier, or FREE once lapsed."""
+        ent = self._lookup(guild_id)
+        if not ent or not ent.active:
+            return "FREE"
+        return ent.tier
+
+    def get_subscription_tier(self, guild_id) -> str:
+        """Purchased tier regardless of expiry (FREE if none)."""
+        ent = self._lookup(guild_id)
+        return ent.tier if ent and not ent.grandfathered else "FREE"
+
+    def is_grandfathered(self, guild_id) -> bool:
+        ent = self._lookup(guild_id)
+        return bool(ent and ent.grandfathered)
+
+    def count_premium(self, guild_ids: Iterable[int]) -> int:
+        return sum(1 for gid in guild_ids if self.is_premium(gid))
@@ -0,0 +1,157 @@
+import asyncio, hashlib, logging, os, tempfile
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Finished renders (e.g. PNGs) kept in memory and on disk.
+
+    Keys are any repr-able value that fully describes the output; they are
+    hashed into file names under ``directory``. Both tiers are LRUs bounded by
+    total size: ``max_memory_bytes`` for the hot in-memory copy and
+    ``max_disk_bytes`` for the directory, which survives restarts. Disk I/O
+    runs in a thread.
+    """
+
+    def __init__(self, directory: str, max_memory_bytes: int = 16 * 1024 * 1024,
+                 max_disk_bytes: int = 128 * 1024 * 1024, suffix: str = ".png"):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # digest -> size, oldest first
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._scan()
+
+    @staticmethod
+    def digest(key) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + self.suffix)
+
+    def _scan(self):
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-len(self.suffix)], stat.st_size))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Error scanning {self.directory}: {e}")
+            return
+        for _, digest, size in sorted(entries):
+            self._disk[digest] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    # --- Memory tier ---
+
+    def _remember(self, digest: str, data: bytes):
+        if digest in self._memory or len(data) > self.max_memory_bytes:
+            return
+        self._memory[digest] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self.memory_bytes -= len(old)
+
+    # --- Disk tier ---
+
+    def _read(self, digest: str) -> Optional[bytes]:
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # keeps LRU order across restarts
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _write(self, digest: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(digest))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self._disk:
+            digest, size = self._disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error evicting cached render {digest}: {e}")
+
+    # --- Public API ---
+
+    async def get(self, key) -> Optional[bytes]:
+        digest = self.digest(key)
+        data = self._memory.get(digest)
+        if data is not None:
+            self._memory.move_to_end(digest)
+            self.memory_hits += 1
+            return data
+
+        if digest in self._disk:
+            try:
+                data = await asyncio.to_thread(self._read, digest)
+            except Exception as e:
+                logger.error(f"Error reading cached render {digest}: {e}")
+                data = None
+            if data is not None:
+                if digest in self._disk:
+                    self._disk.move_to_end(digest)
+                self.disk_hits += 1
+                self._remember(digest, data)
+                return data
+            size = self._disk.pop(digest, 0)
+            self.disk_bytes -= size
+
+        self.misses += 1
+        return None
+
+    async def put(self, key, data: bytes):
+        digest = self.digest(key)
+        self._remember(digest, data)
+        if digest in self._disk or len(data) > self.max_disk_bytes:
+            return
+        try:
+            await asyncio.to_thread(self._write, digest, data)
+        except Exception as e:
+            logger.error(f"Error writing cached render {digest}: {e}")
+            return
+        if digest not in self._disk:
+            self._disk[digest] = len(data)
+            self.disk_bytes += len(data)
+            self._evict_disk()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "memory_entries": len(self._memory), "memory_bytes": self.memory_bytes,
+            "disk_entries": len(self._disk), "disk_bytes": self.disk_bytes,
+            "memory_hits": self.memory_hits, "disk_hits": self.disk_hits,
+            "misses": self.misses, "hit_rate": self.hit_rate,
+        }
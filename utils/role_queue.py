@@ -0,0 +1,157 @@
+import asyncio, logging, time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingEdit:
+    __slots__ = ("add", "remove", "reason", "ready_at", "attempts")
+
+    def __init__(self, ready_at: float, reason: Optional[str]):
+        self.add = set()
+        self.remove = set()
+        self.reason = reason
+        self.ready_at = ready_at
+        self.attempts = 0
+
+
+class RoleMutationQueue:
+    """Coalesces role changes into one ``member.edit(roles=...)`` per member.
+
+    Changes submitted for the same member within ``window`` seconds are merged;
+    a later change for a role overrides an earlier opposite one, and an edit
+    that ends up matching the member's current roles is dropped, so flapping
+    statuses cost no API calls. Each guild drains in its own worker because
+    member edits share a per-guild rate-limit bucket. Workers pace themselves
+    to ``rate`` edits per ``per`` seconds and back off by the Retry-After /
+    X-RateLimit-Reset-After headers whenever Discord answers 429. Edits that
+    hit a 5xx are re-queued with exponential backoff, up to ``max_retries``
+    times.
+    """
+
+    def __init__(self, bot, window: float = 2.0, rate: int = 10, per: float = 10.0,
+                 max_retries: int = 3, retry_base: float = 2.0):
+        self.bot = bot
+        self.window = window
+        self.interval = per / rate
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self._pending: Dict[int, "OrderedDict[int, _PendingEdit]"] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        self._next_allowed: Dict[int, float] = {}
+        self.stats = {"submitted": 0, "edits": 0, "skipped": 0, "rate_limited": 0, "retried": 0, "failed": 0}
+
+    def submit(self, member: discord.Member, add: Iterable[discord.Role] = (),
+               remove: Iterable[discord.Role] = (), reason: Optional[str] = None):
+        add_ids = {r.id for r in add}
+        remove_ids = {r.id for r in remove}
+        if not add_ids and not remove_ids:
+            return
+        self.stats["submitted"] += 1
+        guild_id = member.guild.id
+        queue = self._pending.setdefault(guild_id, OrderedDict())
+        pending = queue.get(member.id)
+        if pending is None:
+            pending = queue[member.id] = _PendingEdit(time.monotonic() + self.window, reason)
+        pending.add = (pending.add - remove_ids) | add_ids
+        pending.remove = (pending.remove - add_ids) | remove_ids
+        pending.reason = reason or pending.reason
+        self._ensure_worker(guild_id)
+
+    def _ensure_worker(self, guild_id: int):
+        worker = self._workers.get(guild_id)
+        if worker is None or worker.done():
+            self._wakeups[guild_id] = asyncio.Event()
+            self._workers[guild_id] = asyncio.create_task(self._guild_worker(guild_id))
+        else:
+            self._wakeups[guild_id].set()
+
+    async def _guild_worker(self, guild_id: int):
+        queue = self._pending.get(guild_id)
+        wakeup = self._wakeups[guild_id]
+        while queue:
+            member_id, pending = next(iter(queue.items()))
+            now = time.monotonic()
+            wait = max(pending.ready_at, self._next_allowed.get(guild_id, 0.0)) - now
+            if wait > 0:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            del queue[member_id]
+            try:
+                await self._apply(guild_id, member_id, pending)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Role edit failed for member {member_id} in guild {guild_id} "
+                             f"(dropped add={sorted(pending.add)} remove={sorted(pending.remove)}): {e}")
+        self._pending.pop(guild_id, None)
+        self._workers.pop(guild_id, None)
+        self._wakeups.pop(guild_id, None)
+
+    async def _apply(self, guild_id: int, member_id: int, pending: _PendingEdit):
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(member_id) if guild else None
+        if member is None:
+            return
+
+        current = {r.id for r in member.roles if not r.is_default()}
+        desired = (current | pending.add) - pending.remove
+        if desired == current:
+            self.stats["skipped"] += 1
+            return
+
+        roles = [r for r in (guild.get_role(rid) for rid in desired) if r]
+        try:
+            await member.edit(roles=roles, reason=pending.reason)
+            self.stats["edits"] += 1
+            self._next_allowed[guild_id] = time.monotonic() + self.interval
+        except discord.Forbidden:
+            self.stats["failed"] += 1
+            logger.warning(f"Missing permissions to edit roles for {member_id} in guild {guild_id}")
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self.stats["rate_limited"] += 1
+                retry_after = self._retry_after(e)
+                logger.warning(f"Role edits rate limited in guild {guild_id}; backing off {retry_after:.1f}s")
+            elif e.status >= 500 and pending.attempts < self.max_retries:
+                self.stats["retried"] += 1
+                retry_after = self.retry_base * 2 ** pending.attempts
+                pending.attempts += 1
+                logger.warning(f"Role edit for {member_id} in guild {guild_id} got HTTP {e.status}; "
+                               f"retry {pending.attempts}/{self.max_retries} in {retry_after:.1f}s")
+            else:
+                raise
+            self._next_allowed[guild_id] = time.monotonic() + retry_after
+            # Put it back at the front, merged with anything submitted meanwhile
+            queue = self._pending.setdefault(guild_id, OrderedDict())
+            newer = queue.pop(member_id, None)
+            if newer:
+                pending.add = (pending.add - newer.remove) | newer.add
+                pending.remove = (pending.remove - newer.add) | newer.remove
+            queue[member_id] = pending
+            queue.move_to_end(member_id, last=False)
+
+    def _retry_after(self, error: discord.HTTPException) -> float:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        for name in ("Retry-After", "X-RateLimit-Reset-After"):
+            try:
+                return max(float(headers[name]), self.interval)
+            except (KeyError, TypeError, ValueError):
+                continue
+        return 5.0
+
+    def pending_count(self) -> int:
+        return sum(len(q) for q in self._pending.values())
+
+    def close(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        self._workers.clear()
@@ -0,0 +1,160 @@
+import hashlib, logging, math, os, struct, tempfile
+
+logger = logging.getLogger(__name__)
+
+_ID = struct.Struct("<Q")
+_BLOOM_HEADER = struct.Struct("<QII")  # bits, hashes, items
+
+
+class SeenSet:
+    """Persistent set of Discord ids with O(1) membership.
+
+    ``exact`` keeps the ids in a Python set. ``bloom`` keeps a Bloom filter
+    sized for ``capacity`` ids at ``error_rate`` false positives: memory stays
+    fixed, at the cost of occasionally treating a new id as already seen.
+
+    Only deltas are written: every new id is appended to ``path`` as 8 bytes.
+    In bloom mode the filter is also snapshotted to ``path + '.bloom'`` every
+    ``compact_every`` additions, and the delta file is then truncated.
+    """
+
+    def __init__(self, path: str, mode: str = "exact", capacity: int = 100_000,
+                 error_rate: float = 0.001, compact_every: int = 1000):
+        self.path = path
+        self.mode = mode if mode in ("exact", "bloom") else "exact"
+        self.compact_every = compact_every
+        self.count = 0
+        self._pending = 0
+        self._ids = set()
+        if self.mode == "bloom":
+            capacity = max(capacity, 1)
+            error_rate = min(max(error_rate, 1e-9), 0.5)
+            self._bits_len = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            self._hashes = max(1, round(self._bits_len / capacity * math.log(2)))
+            self._bits = bytearray((self._bits_len + 7) // 8)
+        self._load()
+
+    # --- Membership ---
+
+    def _positions(self, item: int):
+        digest = hashlib.blake2b(_ID.pack(item), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._bits_len for i in range(self._hashes)]
+
+    def __contains__(self, item: int) -> bool:
+        if self.mode == "exact":
+            return item in self._ids
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _insert(self, item: int) -> bool:
+        if self.mode == "exact":
+            if item in self._ids:
+                return False
+            self._ids.add(item)
+        else:
+            bits = self._bits
+            positions = self._positions(item)
+            if all(bits[p >> 3] & (1 << (p & 7)) for p in positions):
+                return False
+            for p in positions:
+                bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+        return True
+
+    def add(self, item: int) -> bool:
+        """Add an id; returns True (and appends it to disk) if it was not seen before."""
+        if not self._insert(item):
+            return False
+        self._append([item])
+        return True
+
+    def update(self, items):
+        new = [i for i in items if self._insert(i)]
+        self._append(new)
+
+    # --- Persistence ---
+
+    def _append(self, items):
+        if not items:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(b"".join(_ID.pack(i) for i in items))
+        except Exception as e:
+            logger.error(f"Error appending to {self.path}: {e}")
+            return
+        self._pending += len(items)
+        if self.mode == "bloom" and self._pending >= self.compact_every:
+            self.compact()
+
+    def _load(self):
+        if self.mode == "bloom":
+            self._load_snapshot()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Error loading {self.path}: {e}")
+            return
+        data = data[:len(data) - len(data) % _ID.size]  # ignore a torn trailing write
+        for (item,) in _ID.iter_unpack(data):
+            self._insert(item)
+        self._pending = len(data) // _ID.size
+
+    def _load_snapshot(self):
+        try:
+            with open(self.path + ".bloom", "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        bits_len, hashes, count = _BLOOM_HEADER.unpack_from(data)
+        if bits_len != self._bits_len or hashes != self._hashes:
+            logger.warning(f"Bloom parameters changed for {self.path}; starting a fresh filter")
+            return
+        self._bits[:] = data[_BLOOM_HEADER.size:]
+        self.count = count
+
+    def compact(self):
+        """Bloom mode: snapshot the filter, then drop the deltas it now contains."""
+        if self.mode != "bloom":
+            return
+        snapshot = self.path + ".bloom"
+        directory = os.path.dirname(snapshot) or "."
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".bloom")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_BLOOM_HEADER.pack(self._bits_len, self._hashes, self.count))
+                    f.write(self._bits)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, snapshot)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            open(self.path, "wb").close()
+            self._pending = 0
+        except Exception as e:
+            logger.error(f"Error compacting {self.path}: {e}")
+
+    def clear(self):
+        """Forget every id and remove the files."""
+        self.count = 0
+        self._pending = 0
+        self._ids.clear()
+        if self.mode == "bloom":
+            self._bits[:] = bytes(len(self._bits))
+        for path in (self.path, self.path + ".bloom"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
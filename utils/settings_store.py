@@ -0,0 +1,147 @@
+import asyncio, json, logging, os, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class SettingsStore:
+    """Shared in-memory cache for the JSON documents the cogs keep under data/.
+
+    Each file is parsed once and then served from memory. Writes only mark the
+    document dirty; dirty documents are flushed after ``flush_delay`` seconds
+    (write-behind) using a temp file + rename so a crash never leaves half a file.
+    """
+
+    def __init__(self, flush_delay: float = 2.0):
+        self.flush_delay = flush_delay
+        self._docs: Dict[str, object] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Single writer thread keeps flushes ordered
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="settings-store")
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def get(self, path: str, default: Callable[[], object] = dict):
+        """Return the cached document for ``path``, loading it on first access.
+
+        The returned object is the live cached copy; callers that mutate it must
+        call :meth:`mark_dirty` (or :meth:`set`) so the change is persisted.
+        """
+        key = self._key(path)
+        doc = self._docs.get(key)
+        if doc is not None:
+            return doc
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is None:
+                doc = self._load(key, default)
+                self._docs[key] = doc
+        return doc
+
+    def _load(self, key: str, default: Callable[[], object]):
+        try:
+            if os.path.exists(key):
+                with open(key, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading {key}: {e}")
+        return default()
+
+    def contains(self, path: str) -> bool:
+        """True if the document is cached or exists on disk."""
+        key = self._key(path)
+        return key in self._docs or os.path.exists(key)
+
+    def set(self, path: str, data):
+        """Replace the cached document and schedule it for writing."""
+        key = self._key(path)
+        self._docs[key] = data
+        self.mark_dirty(key)
+
+    def mark_dirty(self, path: str):
+        self._dirty.add(self._key(path))
+        self._schedule_flush()
+
+    def invalidate(self, path: str):
+        """Drop a cached document so the next read goes back to disk.
+
+        Pending changes are written first. Queued background writes are waited
+        for, so an older snapshot can't land on disk after this returns.
+        """
+        key = self._key(path)
+        self._executor.submit(lambda: None).result()
+        with self._lock:
+            if key in self._dirty:
+                self._write(key, self._docs[key])
+                self._dirty.discard(key)
+            self._docs.pop(key, None)
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (startup/shutdown or plain scripts): write straight away
+            self.flush()
+            return
+        if self._flush_handle is None or self._flush_handle.cancelled():
+            self._flush_handle = loop.call_later(self.flush_delay, self._flush_soon)
+
+    def _flush_soon(self):
+        self._flush_handle = None
+        # Serialize on the loop so the snapshot is consistent, write off-loop
+        snapshot = self._take_snapshot()
+        if snapshot:
+            asyncio.get_running_loop().run_in_executor(self._executor, self._write_snapshot, snapshot)
+
+    def _take_snapshot(self) -> Dict[str, str]:
+        snapshot = {}
+        for key in list(self._dirty):
+            try:
+                snapshot[key] = json.dumps(self._docs[key], indent=2, ensure_ascii=False)
+            except Exception as e:
+                logger.error(f"Error serializing {key}: {e}")
+        self._dirty.clear()
+        return snapshot
+
+    def _write_snapshot(self, snapshot: Dict[str, str]):
+        with self._lock:
+            for key, text in snapshot.items():
+                self._atomic_write(key, text)
+
+    def _write(self, key: str, data):
+        self._atomic_write(key, json.dumps(data, indent=2, ensure_ascii=False))
+
+    @staticmethod
+    def _atomic_write(key: str, text: str):
+        directory = os.path.dirname(key)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, key)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            logger.error(f"Error writing {key}: {e}")
+
+    def flush(self):
+        """Synchronously write every dirty document (used at shutdown)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # Let queued background writes land first so they can't overwrite newer data
+        self._executor.submit(lambda: None).result()
+        snapshot = self._take_snapshot()
+        if snapshot:
+            self._write_snapshot(snapshot)
+            logger.info(f"Flushed {len(snapshot)} settings document(s)")
@@ -0,0 +1,206 @@
+import hashlib, io, math, os, threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Bump whenever the output changes, so cached results from older renderers aren't reused
+RENDER_VERSION = 2
+
+FONT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "DejaVuSans-Bold.ttf"))
+WIDTH, HEIGHT = 900, 350
+AVATAR_SIZE = 180
+AVATAR_POSITIONS = ((70, 85), (650, 85))
+HEART_COLOR = (255, 100, 150)
+
+# Assets below are cached per worker process: fonts per size, the background
+# (gradient + avatar borders) per color band, the heart layer per size, and
+# the circle masks. Only avatars and text are drawn per render.
+
+# Decoded, resized avatar circles by avatar key (asset hash + size) or text name
+AVATAR_CACHE_SIZE = 64
+_avatar_circles: "OrderedDict[str, Image.Image]" = OrderedDict()
+# Renders run on several threads when the pool falls back from processes
+_avatar_lock = threading.Lock()
+
+
+def color_for_percentage(percentage: int) -> tuple:
+    if percentage <= 20:
+        return (100, 100, 120)
+    elif percentage <= 40:
+        return (200, 100, 50)
+    elif percentage <= 60:
+        return (220, 180, 50)
+    elif percentage <= 80:
+        return (230, 120, 150)
+    else:
+        return (200, 50, 120)
+
+
+@lru_cache(maxsize=16)
+def get_font(size: int):
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def open_avatar(data: Optional[bytes]) -> Optional[Image.Image]:
+    if not data:
+        return None
+    try:
+        return Image.open(io.BytesIO(data)).convert('RGBA')
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4)
+def circle_mask(size: int) -> Image.Image:
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+    return mask
+
+
+def make_circle(img: Image.Image, size: int) -> Image.Image:
+    output = img.resize((size, size), getattr(Image, "Resampling", Image).LANCZOS)
+    output.putalpha(circle_mask(size))
+    return output
+
+
+def draw_heart(draw: ImageDraw.ImageDraw, x: int, y: int, size: int, color: tuple):
+    points = []
+    for angle in range(0, 360, 2):
+        rad = math.radians(angle)
+        heart_x = size * (16 * math.sin(rad) ** 3)
+        heart_y = -size * (13 * math.cos(rad) - 5 * math.cos(2 * rad) - 2 * math.cos(3 * rad) - math.cos(4 * rad))
+        points.append((x + heart_x, y + heart_y))
+    draw.polygon(points, fill=color)
+
+
+def create_text_avatar(text: str, size: int = AVATAR_SIZE) -> Image.Image:
+    """Create a colored avatar with text initial"""
+    text_hash = hashlib.md5(text.encode()).hexdigest()
+    r = int(text_hash[:2], 16)
+    g = int(text_hash[2:4], 16)
+    b = int(text_hash[4:6], 16)
+
+    img = Image.new('RGBA', (size, size), (r, g, b, 255))
+    draw = ImageDraw.Draw(img)
+
+    initial = text[0].upper() if text else "?"
+    font = get_font(size // 2)
+
+    bbox = draw.textbbox((0, 0), initial, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    position = ((size - text_width) // 2 - bbox[0], (size - text_height) // 2 - bbox[1])
+    draw.text(position, initial, font=font, fill=(255, 255, 255))
+
+    return img
+
+
+@lru_cache(maxsize=8)
+def background(color: tuple) -> Image.Image:
+    """Gradient plus the white avatar borders for one color band (copy before drawing)."""
+    img = Image.new('RGB', (WIDTH, HEIGHT), color)
+    draw = ImageDraw.Draw(img)
+
+    # subtle vertical gradient
+    for y in range(HEIGHT):
+        progress = y / HEIGHT
+        r = int(color[0] + (255 - color[0]) * progress * 0.3)
+        g = int(color[1] + (255 - color[1]) * progress * 0.3)
+        b = int(color[2] + (255 - color[2]) * progress * 0.3)
+        draw.line([(0, y), (WIDTH, y)], fill=(r, g, b))
+
+    border_size = AVATAR_SIZE + 10
+    border = Image.new('RGBA', (border_size, border_size), (0, 0, 0, 0))
+    ImageDraw.Draw(border).ellipse((0, 0, border_size, border_size), fill=(255, 255, 255, 255))
+    for x, y in AVATAR_POSITIONS:
+        img.paste(border, (x - 5, y - 5), border)
+    return img
+
+
+@lru_cache(maxsize=32)
+def heart_layer(size: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    """The heart for one heart size, cropped to its bounds, and where it goes on the card."""
+    layer = Image.new('RGBA', (WIDTH, HEIGHT), (0, 0, 0, 0))
+    draw_heart(ImageDraw.Draw(layer), WIDTH // 2, HEIGHT // 2, size, HEART_COLOR + (255,))
+    box = layer.getbbox()
+    return layer.crop(box), box[:2]
+
+
+def avatar_circle(data: Optional[bytes], key: Optional[str], name: str) -> Image.Image:
+    key = key if data else f"text:{name}"
+    if key:
+        with _avatar_lock:
+            circle = _avatar_circles.get(key)
+            if circle is not None:
+                _avatar_circles.move_to_end(key)
+                return circle
+    circle = make_circle(open_avatar(data) or create_text_avatar(name, AVATAR_SIZE), AVATAR_SIZE)
+    if key:
+        with _avatar_lock:
+            _avatar_circles[key] = circle
+            if len(_avatar_circles) > AVATAR_CACHE_SIZE:
+                _avatar_circles.popitem(last=False)
+    return circle
+
+
+def render_ship(avatar1: Optional[bytes], avatar2: Optional[bytes], name1: str, name2: str, percentage: int,
+                key1: Optional[str] = None, key2: Optional[str] = None) -> bytes:
+    """Render the ship card and return it PNG-encoded.
+
+    Runs in an image worker, so it takes plain data only: ``avatar1``/``avatar2``
+    are raw image bytes, or None to draw an initial avatar from the name.
+    ``key1``/``key2`` identify the avatars so their decoded circles are reused.
+    """
+    width, height = WIDTH, HEIGHT
+    img = background(color_for_percentage(percentage)).copy()
+    draw = ImageDraw.Draw(img)
+
+    for avatar, key, name, position in ((avatar1, key1, name1, AVATAR_POSITIONS[0]),
+                                        (avatar2, key2, name2, AVATAR_POSITIONS[1])):
+        circle = avatar_circle(avatar, key, name)
+        img.paste(circle, position, circle)
+
+    # heart and percentage text (stroked outline instead of redrawing the text per offset)
+    heart, heart_position = heart_layer(5 + int(percentage * 0.15))
+    img.paste(heart, heart_position, heart)
+
+    font_large = get_font(100)
+    font_small = get_font(42)
+
+    percentage_text = f"{percentage}%"
+    bbox = draw.textbbox((0, 0), percentage_text, font=font_large)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    text_x = (width - text_width) // 2
+    text_y = (height - text_height) // 2 - 20
+    draw.text((text_x, text_y), percentage_text, font=font_large, fill=(255, 255, 255),
+              stroke_width=3, stroke_fill=(0, 0, 0))
+
+    # names
+    display_name_1 = name1[:12]
+    display_name_2 = name2[:12]
+
+    bbox1 = draw.textbbox((0, 0), display_name_1, font=font_small)
+    bbox2 = draw.textbbox((0, 0), display_name_2, font=font_small)
+    name1_x = 160 - (bbox1[2] - bbox1[0]) // 2
+    name2_x = 740 - (bbox2[2] - bbox2[0]) // 2
+    name_y = 285
+    for x, text in ((name1_x, display_name_1), (name2_x, display_name_2)):
+        draw.text((x, name_y), text, font=font_small, fill=(255, 255, 255), stroke_width=2, stroke_fill=(0, 0, 0))
+
+    # sparkles for high %
+    if percentage >= 80:
+        sparkle_positions = [(150, 50), (750, 50), (150, 300), (750, 300)]
+        for pos in sparkle_positions:
+            draw.line([(pos[0] - 10, pos[1]), (pos[0] + 10, pos[1])], fill=(255, 255, 255), width=3)
+            draw.line([(pos[0], pos[1] - 10), (pos[0], pos[1] + 10)], fill=(255, 255, 255), width=3)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
@@ -0,0 +1,283 @@
+import json, sys, time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+KINDS = ("deleted", "edited", "reaction")
+
+
+class SnipeRecord:
+    """One sniped event, holding ids and strings only (no Member/Message objects).
+
+    ``content`` is the deleted text, the text before an edit, or a preview of
+    the reacted message. ``after`` is the edited text and ``emoji`` the removed
+    reaction. ``target_name`` is the reacted message's author.
+    """
+
+    __slots__ = ("message_id", "guild_id", "channel_id", "author_id", "author_name", "avatar_url",
+                 "content", "after", "attachments", "sticker_count", "jump_url", "emoji",
+                 "target_name", "ts", "size")
+
+    def __init__(self, message_id: int, guild_id: int, channel_id: int, author_id: int,
+                 author_name: str, avatar_url: Optional[str], content: str = "",
+                 after: Optional[str] = None, attachments: Tuple[str, ...] = (),
+                 sticker_count: int = 0, jump_url: Optional[str] = None,
+                 emoji: Optional[str] = None, target_name: Optional[str] = None,
+                 ts: Optional[float] = None):
+        self.message_id = message_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.avatar_url = avatar_url
+        self.content = content or ""
+        self.after = after
+        self.attachments = tuple(attachments)
+        self.sticker_count = sticker_count
+        self.jump_url = jump_url
+        self.emoji = emoji
+        self.target_name = target_name
+        self.ts = ts if ts is not None else time.time()
+        self.size = self._estimate_size()
+
+    def _estimate_size(self) -> int:
+        size = sys.getsizeof(self) + sys.getsizeof(self.attachments)
+        for value in (self.author_name, self.avatar_url, self.content, self.after,
+                      self.jump_url, self.emoji, self.target_name, *self.attachments):
+            if value is not None:
+                size += sys.getsizeof(value)
+        return size
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.ts, timezone.utc)
+
+    def as_row(self, kind: str) -> tuple:
+        """Values in ``utils.database.SNIPE_COLUMNS`` order."""
+        return (kind, self.message_id, self.guild_id, self.channel_id, self.author_id, self.author_name,
+                self.avatar_url, self.content, self.after, json.dumps(self.attachments),
+                self.sticker_count, self.jump_url, self.emoji, self.target_name, self.ts)
+
+    @classmethod
+    def from_row(cls, row) -> "SnipeRecord":
+        return cls(
+            row["message_id"], row["guild_id"], row["channel_id"], row["author_id"],
+            row["author_name"], row["avatar_url"], content=row["content"], after=row["after"],
+            attachments=json.loads(row["attachments"] or "[]"), sticker_count=row["sticker_count"],
+            jump_url=row["jump_url"], emoji=row["emoji"], target_name=row["target_name"], ts=row["ts"]
+        )
+
+
+class _Bucket:
+    __slots__ = ("guild_id", "records", "bytes")
+
+    def __init__(self, guild_id: int, maxlen: int):
+        self.guild_id = guild_id
+        self.records = deque(maxlen=maxlen)
+        self.bytes = 0
+
+
+class SnipeStore:
+    """Bounded in-memory snipe history.
+
+    Records live in per-(kind, channel) rings of ``per_channel`` entries,
+    newest first. Channels are kept in LRU order, globally and per guild.
+    When a guild exceeds ``per_guild`` entries, or the store exceeds
+    ``max_entries`` / ``max_bytes``, whole idle channels are evicted from the
+    cold end. Records older than ``ttl`` seconds are dropped on read and by
+    :meth:`purge_expired`.
+    """
+
+    def __init__(self, per_channel: int = 10, per_guild: int = 2_000, max_entries: int = 50_000,
+                 max_bytes: int = 32 * 1024 * 1024, ttl: float = 6 * 3600):
+        self.per_channel = per_channel
+        self.per_guild = per_guild
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lru: "OrderedDict[Tuple[str, int], _Bucket]" = OrderedDict()
+        self._guild_lru: Dict[int, "OrderedDict[Tuple[str, int], _Bucket]"] = {}
+        self._guild_entries: Dict[int, int] = {}
+        self._guild_bytes: Dict[int, int] = {}
+        self.entries = 0
+        self.bytes = 0
+        self.evicted_channels = 0
+
+    # --- Accounting ---
+
+    def _account(self, bucket: _Bucket, entries: int, size: int):
+        bucket.bytes += size
+        self.entries += entries
+        self.bytes += size
+        gid = bucket.guild_id
+        self._guild_entries[gid] = self._guild_entries.get(gid, 0) + entries
+        self._guild_bytes[gid] = self._guild_bytes.get(gid, 0) + size
+
+    def _drop_bucket(self, key):
+        bucket = self._lru.pop(key)
+        guild_lru = self._guild_lru.get(bucket.guild_id)
+        if guild_lru is not None:
+            guild_lru.pop(key, None)
+            if not guild_lru:
+                del self._guild_lru[bucket.guild_id]
+        self._account(bucket, -len(bucket.records), -bucket.bytes)
+        if not self._guild_entries.get(bucket.guild_id):
+            self._guild_entries.pop(bucket.guild_id, None)
+            self._guild_bytes.pop(bucket.guild_id, None)
+
+    def _touch(self, key, bucket: _Bucket):
+        self._lru.move_to_end(key)
+        self._guild_lru[bucket.guild_id].move_to_end(key)
+
+    # --- Writes ---
+
+    def add(self, kind: str, record: SnipeRecord):
+        key = (kind, record.channel_id)
+        bucket = self._lru.get(key)
+        if bucket is None:
+            bucket = self._lru[key] = _Bucket(record.guild_id, self.per_channel)
+            self._guild_lru.setdefault(record.guild_id, OrderedDict())[key] = bucket
+        else:
+            self._touch(key, bucket)
+
+        if len(bucket.records) == bucket.records.maxlen:
+            oldest = bucket.records.pop()
+            self._account(bucket, -1, -oldest.size)
+        bucket.records.appendleft(record)
+        self._account(bucket, 1, record.size)
+        self._enforce(key, record.guild_id)
+
+    def _enforce(self, current_key, guild_id: int):
+        guild_lru = self._guild_lru.get(guild_id)
+        while guild_lru and self._guild_entries.get(guild_id, 0) > self.per_guild:
+            key = next(iter(guild_lru))
+            if key == current_key:
+                break
+            self._drop_bucket(key)
+            self.evicted_channels += 1
+
+        while self._lru and (self.entries > self.max_entries or self.bytes > self.max_bytes):
+            key = next(iter(self._lru))
+            if key == current_key:
+                break
+            self._drop_bucket(key)
+            self.evicted_channels += 1
+
+    # --- Reads ---
+
+    def _prune(self, key, bucket: _Bucket, cutoff: float):
+        records = bucket.records
+        while records and records[-1].ts < cutoff:
+            old = records.pop()
+            self._account(bucket, -1, -old.size)
+        if not records:
+            self._drop_bucket(key)
+
+    def get(self, kind: str, channel_id: int) -> List[SnipeRecord]:
+        """Records for a channel, newest first (expired ones are dropped)."""
+        key = (kind, channel_id)
+        bucket = self._lru.get(key)
+        if bucket is None:
+            return []
+        self._prune(key, bucket, time.time() - self.ttl)
+        if key not in self._lru:
+            return []
+        self._touch(key, bucket)
+        return list(bucket.records)
+
+    def find(self, kind: str, channel_id: int, message_id: int) -> Optional[SnipeRecord]:
+        bucket = self._lru.get((kind, channel_id))
+        if bucket:
+            for record in bucket.records:
+                if record.message_id == message_id:
+                    return record
+        return None
+
+    def by_author(self, kind: str, guild_id: int, author_id: int, limit: int = 10) -> List[SnipeRecord]:
+        """Newest in-memory records by one author across a guild (scans that guild's channels)."""
+        cutoff = time.time() - self.ttl
+        matches = [
+            record
+            for (bucket_kind, _), bucket in self._guild_lru.get(guild_id, {}).items() if bucket_kind == kind
+            for record in bucket.records if record.author_id == author_id and record.ts >= cutoff
+        ]
+        matches.sort(key=lambda record: record.ts, reverse=True)
+        return matches[:limit]
+
+    def clear_channel(self, channel_id: int) -> int:
+        cleared = 0
+        for kind in KINDS:
+            bucket = self._lru.get((kind, channel_id))
+            if bucket:
+                cleared += len(bucket.records)
+                self._drop_bucket((kind, channel_id))
+        return cleared
+
+    def purge_expired(self) -> int:
+        """Drop expired records everywhere; returns how many entries went."""
+        before = self.entries
+        cutoff = time.time() - self.ttl
+        for key, bucket in list(self._lru.items()):
+            self._prune(key, bucket, cutoff)
+        return before - self.entries
+
+    def guild_stats(self, guild_id: int) -> Dict[str, int]:
+        counts = dict.fromkeys(KINDS, 0)
+        for (kind, _), bucket in self._guild_lru.get(guild_id, {}).items():
+            counts[kind] += len(bucket.records)
+        counts["channels"] = len(self._guild_lru.get(guild_id, ()))
+        counts["bytes"] = self._guild_bytes.get(guild_id, 0)
+        return counts
+
+
+class CachedMessage:
+    __slots__ = ("author_id", "author_name", "avatar_url", "content", "attachments", "sticker_count")
+
+    def __init__(self, author_id: int, author_name: str, avatar_url: Optional[str], content: str,
+                 attachments: Tuple[str, ...] = (), sticker_count: int = 0):
+        self.author_id = author_id
+        self.author_name = author_name
+        self.avatar_url = avatar_url
+        self.content = content
+        self.attachments = tuple(attachments)
+        self.sticker_count = sticker_count
+
+
+class RecentMessageCache:
+    """Content of recent messages, so raw delete/edit events can be sniped.
+
+    Keeps the last ``per_channel`` messages of at most ``max_channels``
+    channels (least recently active channels are dropped first). Memory
+    scales with these two numbers, not with the library's message cache.
+    """
+
+    def __init__(self, per_channel: int = 50, max_channels: int = 2_000):
+        self.per_channel = per_channel
+        self.max_channels = max_channels
+        self._channels: "OrderedDict[int, OrderedDict[int, CachedMessage]]" = OrderedDict()
+
+    def put(self, channel_id: int, message_id: int, entry: CachedMessage):
+        ring = self._channels.get(channel_id)
+        if ring is None:
+            ring = self._channels[channel_id] = OrderedDict()
+            if len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(channel_id)
+        ring[message_id] = entry
+        if len(ring) > self.per_channel:
+            ring.popitem(last=False)
+
+    def get(self, channel_id: int, message_id: int) -> Optional[CachedMessage]:
+        ring = self._channels.get(channel_id)
+        return ring.get(message_id) if ring else None
+
+    def pop(self, channel_id: int, message_id: int) -> Optional[CachedMessage]:
+        ring = self._channels.get(channel_id)
+        return ring.pop(message_id, None) if ring else None
+
+    def forget_channel(self, channel_id: int):
+        self._channels.pop(channel_id, None)
+
+    def __len__(self) -> int:
+        return sum(len(ring) for ring in self._channels.values())
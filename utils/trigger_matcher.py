@@ -0,0 +1,133 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+MATCH_MODES = ("substring", "word_boundary", "exact")
+PRIORITY_MODES = ("all_matches", "longest_first", "first_match")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class TriggerMatcher:
+    """Aho–Corasick automaton over a fixed set of trigger phrases.
+
+    Built once per trigger set and reused; :meth:`find` reports every trigger
+    occurring in a text in a single pass, so the cost per status is linear in
+    the status length no matter how many triggers a guild has.
+
+    ``match_mode``: ``substring`` (anywhere), ``word_boundary`` (whole words)
+    or ``exact`` (the whole, stripped text).
+    ``priority_mode``: ``all_matches``, ``longest_first`` (drop matches that
+    overlap a longer one) or ``first_match`` (only the earliest match).
+    """
+
+    __slots__ = ("triggers", "match_mode", "priority_mode", "case_sensitive",
+                 "_goto", "_fail", "_out", "_lengths", "_exact")
+
+    def __init__(self, triggers: Iterable[str], match_mode: str = "substring",
+                 priority_mode: str = "all_matches", case_sensitive: bool = False):
+        self.match_mode = match_mode if match_mode in MATCH_MODES else "substring"
+        self.priority_mode = priority_mode if priority_mode in PRIORITY_MODES else "all_matches"
+        self.case_sensitive = case_sensitive
+        self.triggers: List[str] = [t for t in dict.fromkeys(triggers) if t]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._lengths: List[int] = []
+        self._exact: Dict[str, int] = {}
+        if self.match_mode == "exact":
+            for idx, trigger in enumerate(self.triggers):
+                self._exact.setdefault(self._norm(trigger).strip(), idx)
+        else:
+            self._build()
+
+    def _norm(self, text: str) -> str:
+        return text if self.case_sensitive else text.lower()
+
+    def _build(self):
+        goto, out = self._goto, self._out
+        for idx, trigger in enumerate(self.triggers):
+            # Spans are measured in the normalised text; lower() can change the length
+            norm = self._norm(trigger)
+            self._lengths.append(len(norm))
+            state = 0
+            for ch in norm:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                    self._fail.append(0)
+                state = nxt
+            out[state].append(idx)
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in goto[fail]:
+                    fail = self._fail[fail]
+                target = goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                out[nxt].extend(out[self._fail[nxt]])
+
+    def _scan(self, text: str) -> List[Tuple[int, int, int]]:
+        """Return ``(start, end, trigger_index)`` for every occurrence."""
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        hits = []
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                hits.append((pos + 1 - lengths[idx], pos + 1, idx))
+        return hits
+
+    def find(self, text: str) -> List[str]:
+        """Triggers matching ``text``, ordered by priority."""
+        if not text or not self.triggers:
+            return []
+        norm = self._norm(text)
+
+        if self.match_mode == "exact":
+            idx = self._exact.get(norm.strip())
+            return [self.triggers[idx]] if idx is not None else []
+
+        hits = self._scan(norm)
+        if self.match_mode == "word_boundary":
+            hits = [
+                (start, end, idx) for start, end, idx in hits
+                if (start == 0 or not _is_word_char(norm[start - 1]))
+                and (end == len(norm) or not _is_word_char(norm[end]))
+            ]
+        if not hits:
+            return []
+
+        if self.priority_mode == "first_match":
+            start, end, idx = min(hits, key=lambda h: (h[0], -(h[1] - h[0])))
+            return [self.triggers[idx]]
+
+        if self.priority_mode == "longest_first":
+            taken: List[Tuple[int, int]] = []
+            chosen: List[int] = []
+            for start, end, idx in sorted(hits, key=lambda h: (-(h[1] - h[0]), h[0])):
+                if any(start < t_end and t_start < end for t_start, t_end in taken):
+                    continue
+                taken.append((start, end))
+                if idx not in chosen:
+                    chosen.append(idx)
+            return [self.triggers[idx] for idx in chosen]
+
+        seen: Set[int] = set()
+        ordered = []
+        for _, _, idx in sorted(hits):
+            if idx not in seen:
+                seen.add(idx)
+                ordered.append(self.triggers[idx])
+        return ordered